@@ -0,0 +1,71 @@
+import csv
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+FIELDNAMES = ["name", "monologue"]
+
+
+def render_rows(rows, fieldnames=FIELDNAMES):
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def same_content(path, payload):
+    try:
+        if os.path.getsize(path) != len(payload):
+            return False
+    except OSError:
+        return False
+    return file_digest(path) == hashlib.sha256(payload).hexdigest()
+
+
+def write_bytes_atomic(path, payload):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if same_content(path, payload):
+        return False
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    # Temp file in the target directory so os.replace() stays a same-filesystem rename.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            os.fchmod(fh.fileno(), mode)
+            fh.write(payload)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return True
+
+
+def write_rows_atomic(path, rows, fieldnames=FIELDNAMES):
+    return write_bytes_atomic(path, render_rows(rows, fieldnames=fieldnames))
+
+
+def grouped_rows(rows_by_name):
+    for name, entries in rows_by_name.items():
+        for entry in entries:
+            yield {"name": name, "monologue": entry}
@@ -0,0 +1,84 @@
+import csv
+import os
+from pathlib import Path
+
+SOURCE_NAMES = ("newsmax", "latenighter", "scraps")
+
+KNOWN_HOSTS = {
+    "Conan O'Brian",
+    "Craig Ferguson",
+    "Daily Show",
+    "David Letterman",
+    "Desi Lydic",
+    "James Corden",
+    "Jay Leno",
+    "Jimmy Fallon",
+    "Jimmy Kimmel",
+    "John Oliver",
+    "Jon Stewart",
+    "Jordan Klepper",
+    "Michael Kosta",
+    "Ronny Chieng",
+    "Seth Meyers",
+    "Stephen Colbert",
+    "Taylor Tomlinson",
+}
+
+# Lowercased spellings seen in the sources that mean one of KNOWN_HOSTS.
+HOST_ALIASES = {
+    **{host.split()[-1].lower(): host for host in KNOWN_HOSTS if host != "Daily Show"},
+    "conan o'brien": "Conan O'Brian",
+    "conan obrien": "Conan O'Brian",
+    "conan": "Conan O'Brian",
+    "the daily show": "Daily Show",
+}
+
+
+def source_dirs(root="."):
+    root = Path(root)
+    dirs = {}
+
+    newsmax_dir = root / "newsmax"
+    if newsmax_dir.is_dir():
+        year_dirs = []
+        for entry in sorted(os.listdir(newsmax_dir)):
+            path = newsmax_dir / entry
+            if path.is_dir() and entry.isdigit() and len(entry) == 4:
+                year_dirs.append(str(path))
+        dirs["newsmax"] = year_dirs + [str(newsmax_dir)]
+
+    for source_name in ("latenighter", "scraps"):
+        path = root / source_name
+        if path.is_dir():
+            dirs[source_name] = [str(path)]
+
+    return dirs
+
+
+def iter_source_files(root=".", sources=None):
+    for source_name, directories in source_dirs(root).items():
+        if sources and source_name not in sources:
+            continue
+        for dirname in directories:
+            for filename in sorted(os.listdir(dirname)):
+                if filename.endswith(".csv"):
+                    yield source_name, filename[:-4], Path(dirname) / filename
+
+
+def normalized_rows(path):
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            name = (row.get("name") or "").strip().replace("\t", " ")
+            text = " ".join((row.get("monologue") or "").split())
+            if name and text:
+                yield name, text
+
+
+def canonical_host(name):
+    if name in KNOWN_HOSTS:
+        return name
+    key = " ".join(name.split()).lower()
+    for host in KNOWN_HOSTS:
+        if host.lower() == key:
+            return host
+    return HOST_ALIASES.get(key)
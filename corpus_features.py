@@ -0,0 +1,344 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from atomic_csv import file_digest, write_bytes_atomic
+from corpus import SOURCE_NAMES, iter_source_files, normalized_rows
+
+DEFAULT_FEATURES_DIR = os.path.join(".cache", "features")
+FEATURES_FORMAT = 1
+TOKENIZER_VERSION = 1
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "ʼ": "'"})
+
+# name -> dtype of the append-only raw arrays in the features directory.
+ARRAYS = {
+    "indptr": np.int64,
+    "indices": np.int32,
+    "data": np.int32,
+    "row_source": np.int8,
+    "row_date": np.int64,
+    "row_host": np.int32,
+    "row_file": np.int32,
+}
+ROW_ARRAYS = ("row_source", "row_date", "row_host", "row_file")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().translate(APOSTROPHES))
+
+
+def tokenize_file(path):
+    return [(name, Counter(tokenize(text))) for name, text in normalized_rows(path)]
+
+
+def iter_tokenized(paths, workers):
+    if workers <= 1:
+        yield from map(tokenize_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(tokenize_file, paths, chunksize=16)
+
+
+def array_path(directory, name):
+    return Path(directory) / f"{name}.{np.dtype(ARRAYS[name]).name}"
+
+
+def open_array(directory, name, length, mmap=True):
+    dtype = ARRAYS[name]
+    if length == 0:
+        return np.zeros(0, dtype=dtype)
+    path = array_path(directory, name)
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+    return np.fromfile(path, dtype=dtype, count=length)
+
+
+class Features:
+    def __init__(self, directory, manifest, mmap=True):
+        self.directory = Path(directory)
+        self.manifest = manifest
+        rows = manifest["rows"]
+        nnz = manifest["nnz"]
+        self.indptr = open_array(directory, "indptr", rows + 1, mmap)
+        if not len(self.indptr):
+            self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = open_array(directory, "indices", nnz, mmap)
+        self.data = open_array(directory, "data", nnz, mmap)
+        self.row_source = open_array(directory, "row_source", rows, mmap)
+        self.row_date = open_array(directory, "row_date", rows, mmap).view("datetime64[D]")
+        self.row_host = open_array(directory, "row_host", rows, mmap)
+        self.row_file = open_array(directory, "row_file", rows, mmap)
+        self.hosts = manifest["hosts"]
+        self.sources = manifest["sources"]
+        with open(self.directory / "vocab.txt", "r", encoding="utf-8") as fh:
+            self.vocab = [line.rstrip("\n") for _, line in zip(range(manifest["vocab_size"]), fh)]
+
+    @property
+    def shape(self):
+        return (self.manifest["rows"], self.manifest["vocab_size"])
+
+    def csr(self):
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def row(self, index):
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end], self.data[start:end]
+
+
+def load_manifest(directory):
+    try:
+        with open(Path(directory) / "manifest.json", "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return None
+    if (
+        manifest.get("format") != FEATURES_FORMAT
+        or manifest.get("tokenizer") != TOKENIZER_VERSION
+    ):
+        return None
+    return manifest
+
+
+def load_features(directory=DEFAULT_FEATURES_DIR, mmap=True):
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"no feature matrix in {directory}; run corpus_features.py first")
+    return Features(directory, manifest, mmap=mmap)
+
+
+def empty_manifest():
+    return {
+        "format": FEATURES_FORMAT,
+        "tokenizer": TOKENIZER_VERSION,
+        "sources": list(SOURCE_NAMES),
+        "rows": 0,
+        "nnz": 0,
+        "vocab_size": 0,
+        "hosts": [],
+        "files": {},
+    }
+
+
+def scan_tree(root, manifest):
+    current = []
+    needs_rebuild = None
+    known = manifest["files"]
+    seen = set()
+    for source, date_value, path in iter_source_files(root):
+        key = str(path)
+        seen.add(key)
+        stat = path.stat()
+        record = known.get(key)
+        if record is not None and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            continue
+        digest = file_digest(path)
+        if record is not None:
+            if record["digest"] != digest:
+                needs_rebuild = f"{key} changed"
+            else:
+                record["size"] = stat.st_size
+                record["mtime_ns"] = stat.st_mtime_ns
+            continue
+        current.append((source, date_value, path, digest, stat))
+    removed = sorted(set(known) - seen)
+    if removed:
+        needs_rebuild = f"{removed[0]} removed"
+    return current, needs_rebuild
+
+
+def reset_arrays(directory, manifest):
+    # Drop bytes past the last committed manifest (e.g. from an interrupted
+    # append) so new rows start at the recorded offsets.
+    lengths = {
+        "indptr": manifest["rows"] + 1 if manifest["rows"] else 0,
+        "indices": manifest["nnz"],
+        "data": manifest["nnz"],
+    }
+    for name, dtype in ARRAYS.items():
+        path = array_path(directory, name)
+        size = lengths.get(name, manifest["rows"]) * np.dtype(dtype).itemsize
+        with open(path, "ab") as fh:
+            fh.truncate(size)
+    with open(Path(directory) / "vocab.txt", "a", encoding="utf-8"):
+        pass
+    with open(Path(directory) / "vocab.txt", "r+", encoding="utf-8") as fh:
+        lines = fh.readlines()[: manifest["vocab_size"]]
+        fh.seek(0)
+        fh.writelines(lines)
+        fh.truncate()
+
+
+def swap_directory(staging, directory):
+    # A directory cannot be renamed over a non-empty one, so the old tree is
+    # moved aside first. Readers holding memmaps keep the unlinked files.
+    old = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    if directory.exists():
+        os.replace(directory, old)
+    os.replace(staging, directory)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def build(root=".", directory=DEFAULT_FEATURES_DIR, workers=1, rebuild=False):
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    manifest = None if rebuild else load_manifest(directory)
+    reason = "requested" if rebuild else None
+    if manifest is None:
+        manifest = empty_manifest()
+        reason = reason or "no manifest"
+    new_files, changed = scan_tree(root, manifest)
+    if changed:
+        reason = changed
+        manifest = empty_manifest()
+        new_files, _ = scan_tree(root, manifest)
+
+    # Appends go past the committed lengths in place; a full build is
+    # written to a sibling directory so the live manifest never describes
+    # half-rewritten arrays.
+    target = directory
+    if manifest["rows"] == 0:
+        target = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+        shutil.rmtree(target, ignore_errors=True)
+    target.mkdir(parents=True, exist_ok=True)
+    reset_arrays(target, manifest)
+    vocab = {}
+    with open(target / "vocab.txt", "r", encoding="utf-8") as fh:
+        for index, line in enumerate(fh):
+            vocab[line.rstrip("\n")] = index
+    host_index = {name: index for index, name in enumerate(manifest["hosts"])}
+    file_index = len(manifest["files"])
+    rows = manifest["rows"]
+    nnz = manifest["nnz"]
+
+    handles = {name: open(array_path(target, name), "ab") for name in ARRAYS}
+    vocab_fh = open(target / "vocab.txt", "a", encoding="utf-8")
+    try:
+        if rows == 0:
+            handles["indptr"].write(np.zeros(1, dtype=np.int64).tobytes())
+        paths = [str(path) for _, _, path, _, _ in new_files]
+        for (source, date_value, path, digest, stat), file_rows in zip(
+            new_files, iter_tokenized(paths, workers)
+        ):
+            indptr = []
+            indices = []
+            data = []
+            new_terms = []
+            for _, counts in file_rows:
+                for term in counts:
+                    if term not in vocab:
+                        vocab[term] = len(vocab)
+                        new_terms.append(term)
+                columns = sorted((vocab[term], count) for term, count in counts.items())
+                indices.extend(column for column, _ in columns)
+                data.extend(count for _, count in columns)
+                nnz += len(columns)
+                indptr.append(nnz)
+
+            count = len(file_rows)
+            day = np.datetime64(date_value, "D").astype(np.int64)
+            host_ids = [host_index.setdefault(name, len(host_index)) for name, _ in file_rows]
+            handles["indptr"].write(np.array(indptr, dtype=np.int64).tobytes())
+            handles["indices"].write(np.array(indices, dtype=np.int32).tobytes())
+            handles["data"].write(np.array(data, dtype=np.int32).tobytes())
+            handles["row_source"].write(np.full(count, SOURCE_NAMES.index(source), dtype=np.int8).tobytes())
+            handles["row_date"].write(np.full(count, day, dtype=np.int64).tobytes())
+            handles["row_host"].write(np.array(host_ids, dtype=np.int32).tobytes())
+            handles["row_file"].write(np.full(count, file_index, dtype=np.int32).tobytes())
+            vocab_fh.writelines(f"{term}\n" for term in new_terms)
+
+            manifest["files"][str(path)] = {
+                "index": file_index,
+                "digest": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "row_start": rows,
+                "row_end": rows + count,
+            }
+            file_index += 1
+            rows += count
+    except BaseException:
+        if target != directory:
+            shutil.rmtree(target, ignore_errors=True)
+        raise
+    finally:
+        for handle in handles.values():
+            handle.close()
+        vocab_fh.close()
+
+    manifest["rows"] = rows
+    manifest["nnz"] = nnz
+    manifest["vocab_size"] = len(vocab)
+    manifest["hosts"] = list(host_index)
+    # The manifest is written last: readers only ever see committed lengths.
+    write_bytes_atomic(
+        target / "manifest.json",
+        json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8") + b"\n",
+    )
+    if target != directory:
+        swap_directory(target, directory)
+    return manifest, len(new_files), reason
+
+
+def export_npz(features, path):
+    # Same keys scipy.sparse.save_npz writes, so scipy.sparse.load_npz reads it.
+    np.savez(
+        path,
+        format=np.array("csr"),
+        shape=np.array(features.shape),
+        indptr=np.asarray(features.indptr),
+        indices=np.asarray(features.indices),
+        data=np.asarray(features.data),
+        row_source=np.asarray(features.row_source),
+        row_date=np.asarray(features.row_date),
+        row_host=np.asarray(features.row_host),
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build or extend the cached document-term matrix (one row per "
+            "monologue) with source, date and host metadata."
+        )
+    )
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument("--output-dir", default=DEFAULT_FEATURES_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rebuild", action="store_true", help="Ignore existing arrays and tokenize everything.")
+    parser.add_argument("--export-npz", default=None, help="Also write a scipy-compatible CSR .npz file.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    manifest, added, reason = build(
+        root=args.root, directory=args.output_dir, workers=args.workers, rebuild=args.rebuild
+    )
+    if reason:
+        print(f"[features] rebuild reason={reason}")
+    if args.export_npz:
+        export_npz(load_features(args.output_dir), args.export_npz)
+        print(f"[features] exported={args.export_npz}")
+    print(
+        f"Summary: files_added={added} rows={manifest['rows']} vocab={manifest['vocab_size']} "
+        f"nnz={manifest['nnz']} hosts={len(manifest['hosts'])} "
+        f"seconds={time.perf_counter() - started:.2f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
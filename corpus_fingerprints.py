@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import heapq
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from atomic_csv import write_bytes_atomic
+from corpus import iter_source_files, normalized_rows, source_dirs
+
+DEFAULT_FINGERPRINTS_PATH = os.path.join(".cache", "fingerprints.bin")
+
+
+def normalize_text(text):
+    return " ".join(text.split()).lower()
+
+
+def fingerprint(text):
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def file_fingerprints(path):
+    return {fingerprint(text) for _, text in normalized_rows(path)}
+
+
+def existing_fingerprints(path):
+    if path is None or not os.path.exists(path):
+        return set()
+    return file_fingerprints(path)
+
+
+class FingerprintSet:
+    def __init__(self, path=None, values=None):
+        self.path = path
+        # Sorted, unique 64-bit values: 8 bytes per record, bisect lookups.
+        self.values = values if values is not None else array("Q")
+        self.added = set()
+        # Kept by filter_rows but not yet written; they block duplicates in
+        # this run and are only saved once commit() confirms the write.
+        self.pending = set()
+        self.dropped = 0
+        # One set can be shared by crawlers running in threads.
+        self.lock = threading.RLock()
+
+    def load(self):
+        self.values = read_values(self.path)
+        return self
+
+    def __len__(self):
+        return len(self.values) + len(self.added)
+
+    def __contains__(self, value):
+        if value in self.added or value in self.pending:
+            return True
+        index = bisect_left(self.values, value)
+        return index < len(self.values) and self.values[index] == value
+
+    def filter_rows(self, rows_by_name, existing_path=None):
+        kept = {}
+        seen = set()
+        own = None
+        dropped = 0
+        with self.lock:
+            for name, entries in rows_by_name.items():
+                for entry in entries:
+                    value = fingerprint(entry)
+                    duplicate = value in seen
+                    if not duplicate and value in self:
+                        # Rows already in the file being rewritten are that
+                        # file's own, not duplicates from elsewhere. The file
+                        # is only read once something matches.
+                        if own is None:
+                            own = existing_fingerprints(existing_path)
+                        duplicate = value not in own
+                    if duplicate:
+                        dropped += 1
+                        continue
+                    seen.add(value)
+                    kept.setdefault(name, []).append(entry)
+            self.pending.update(seen)
+            self.dropped += dropped
+        return kept, dropped
+
+    def commit(self, rows_by_name):
+        values = {fingerprint(entry) for entries in rows_by_name.values() for entry in entries}
+        with self.lock:
+            self.added.update(values)
+            self.pending.difference_update(values)
+
+    def scope(self):
+        return FingerprintScope(self)
+
+    def save(self):
+        with self.lock:
+            if not self.path or not self.added:
+                return False
+            # Re-read under the file lock before merging so adds from another
+            # crawler saving at the same time are kept.
+            with locked(self.path):
+                current = read_values(self.path)
+                merged = array("Q")
+                previous = None
+                for value in heapq.merge(current, sorted(self.added)):
+                    if value != previous:
+                        merged.append(value)
+                        previous = value
+                write_values(self.path, merged)
+            self.values = merged
+            self.added = set()
+            return True
+
+
+class FingerprintScope:
+    # One crawler's handle on a shared FingerprintSet, counting only the rows
+    # that crawler dropped.
+    def __init__(self, shared):
+        self.shared = shared
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.shared)
+
+    def __contains__(self, value):
+        return value in self.shared
+
+    def filter_rows(self, rows_by_name, existing_path=None):
+        kept, dropped = self.shared.filter_rows(rows_by_name, existing_path)
+        self.dropped += dropped
+        return kept, dropped
+
+    def commit(self, rows_by_name):
+        self.shared.commit(rows_by_name)
+
+    def save(self):
+        return self.shared.save()
+
+
+@contextmanager
+def locked(path):
+    import fcntl
+
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def read_values(path):
+    values = array("Q")
+    try:
+        with open(path, "rb") as fh:
+            values.frombytes(fh.read())
+    except FileNotFoundError:
+        pass
+    return values
+
+
+def write_values(path, values):
+    return write_bytes_atomic(path, values.tobytes())
+
+
+def build_from_corpus(root=".", path=DEFAULT_FINGERPRINTS_PATH):
+    values = set()
+    files = 0
+    for _, _, csv_path in iter_source_files(root):
+        values.update(file_fingerprints(csv_path))
+        files += 1
+    fingerprints = FingerprintSet(path, array("Q", sorted(values)))
+    if path:
+        with locked(path):
+            write_values(path, fingerprints.values)
+    return fingerprints, files
+
+
+def add_fingerprint_arguments(parser):
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help=(
+            "Drop rows whose normalized text is already anywhere in the corpus "
+            "(checked against --fingerprints) before writing."
+        ),
+    )
+    parser.add_argument(
+        "--fingerprints",
+        default=DEFAULT_FINGERPRINTS_PATH,
+        help="Sorted 64-bit fingerprint file; built from the parent of --output-dir if missing.",
+    )
+
+
+def corpus_root(args):
+    # The crawlers write to <root>/<source>, so the corpus root is the parent
+    # of --output-dir.
+    return Path(args.output_dir).resolve().parent
+
+
+def fingerprints_from_args(args):
+    if not getattr(args, "dedupe", False):
+        return None
+    if not os.path.exists(args.fingerprints):
+        root = corpus_root(args)
+        if not source_dirs(root):
+            raise FileNotFoundError(
+                f"{args.fingerprints} is missing and there is no newsmax/, latenighter/ or scraps/ "
+                f"under {root} to build it from; run corpus_fingerprints.py build --root <corpus>"
+            )
+        fingerprints, files = build_from_corpus(root, args.fingerprints)
+        print(f"[fingerprints] built={args.fingerprints} root={root} files={files} records={len(fingerprints)}")
+        return fingerprints
+    return FingerprintSet(args.fingerprints).load()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Build or query the corpus-wide set of 64-bit monologue text fingerprints."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Rebuild the set from every CSV under --root.")
+    build.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    build.add_argument("--output", default=DEFAULT_FINGERPRINTS_PATH)
+
+    check = subparsers.add_parser("check", help="Report whether texts are already in the set.")
+    check.add_argument("texts", nargs="+")
+    check.add_argument("--fingerprints", default=DEFAULT_FINGERPRINTS_PATH)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "build":
+        started = time.perf_counter()
+        fingerprints, files = build_from_corpus(args.root, args.output)
+        print(
+            f"Summary: files={files} records={len(fingerprints)} "
+            f"bytes={len(fingerprints.values) * fingerprints.values.itemsize} "
+            f"seconds={time.perf_counter() - started:.2f}"
+        )
+        return 0
+
+    started = time.perf_counter()
+    fingerprints = FingerprintSet(args.fingerprints).load()
+    loaded = time.perf_counter()
+    for text in args.texts:
+        print(f"{'seen' if fingerprint(text) in fingerprints else 'new'}\t{text}")
+    print(f"[fingerprints] records={len(fingerprints)} load_ms={(loaded - started) * 1000:.2f}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+from corpus import SOURCE_NAMES, iter_source_files, normalized_rows
+
+DEFAULT_PORT = 8810
+DEFAULT_CACHE_MB = 256
+DEFAULT_RELOAD_SECONDS = 2.0
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+MAX_HEADER_BYTES = 16384
+ROW_OVERHEAD_BYTES = 120
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class LRU:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        self.discard(key)
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def discard_where(self, predicate):
+        for key in [key for key in self.entries if predicate(key)]:
+            self.discard(key)
+
+
+def rows_size(rows):
+    return sum(len(name) + len(text) + ROW_OVERHEAD_BYTES for name, text in rows)
+
+
+def scan_days(root):
+    days = {}
+    for source, date_value, path in iter_source_files(root):
+        days[(source, date_value)] = (str(path), os.stat(path).st_mtime_ns)
+    return days
+
+
+class CorpusStore:
+    def __init__(self, root=".", cache_bytes=DEFAULT_CACHE_MB << 20):
+        self.root = root
+        self.cache = LRU(cache_bytes)
+        self.days = {}
+        self.dates = {source: [] for source in SOURCE_NAMES}
+        self.generation = 0
+        self.reloads = 0
+
+    def apply_scan(self, days):
+        changed = {key for key in days.keys() | self.days.keys() if days.get(key) != self.days.get(key)}
+        if not changed and self.days:
+            return 0
+        self.days = days
+        self.dates = {source: [] for source in SOURCE_NAMES}
+        for source, date_value in sorted(days):
+            self.dates[source].append(date_value)
+        # Host slices may include any changed day, so they all go; day
+        # entries only go for the days that changed.
+        self.cache.discard_where(lambda key: key[0] == "day" and key[1:] in changed or key[0] == "slice")
+        if self.generation:
+            self.reloads += len(changed)
+        self.generation += 1
+        return len(changed)
+
+    async def refresh(self):
+        return self.apply_scan(await asyncio.to_thread(scan_days, self.root))
+
+    async def day_rows(self, source, date_value):
+        key = ("day", source, date_value)
+        rows = self.cache.get(key)
+        if rows is not None:
+            return rows
+        entry = self.days.get((source, date_value))
+        if entry is None:
+            return []
+        rows = await asyncio.to_thread(lambda: list(normalized_rows(entry[0])))
+        if self.days.get((source, date_value)) == entry:
+            self.cache.put(key, rows, rows_size(rows))
+        return rows
+
+    async def load_missing(self, keys):
+        missing = [key for key in keys if ("day", *key) not in self.cache.entries and key in self.days]
+        if not missing:
+            return
+        entries = [self.days[key] for key in missing]
+        # One worker-thread hop for the whole batch instead of one per day.
+        loaded = await asyncio.to_thread(lambda: [list(normalized_rows(path)) for path, _ in entries])
+        for key, entry, rows in zip(missing, entries, loaded):
+            if self.days.get(key) == entry:
+                self.cache.put(("day", *key), rows, rows_size(rows))
+
+    def day_keys(self, sources, since, until):
+        keys = []
+        for source in sources:
+            dates = self.dates.get(source, [])
+            start = bisect.bisect_left(dates, since) if since else 0
+            end = bisect.bisect_right(dates, until) if until else len(dates)
+            keys.extend((source, date_value) for date_value in dates[start:end])
+        keys.sort(key=lambda key: (key[1], SOURCE_NAMES.index(key[0])))
+        return keys
+
+    async def records(self, sources, since, until, host, text, offset=0, limit=DEFAULT_LIMIT):
+        if not host and not text:
+            return await self.page(sources, since, until, offset, limit)
+        slice_key = ("slice", tuple(sources), since, until, host, text)
+        records = self.cache.get(slice_key)
+        if records is None:
+            host = host.lower() if host else None
+            text = text.lower() if text else None
+            keys = self.day_keys(sources, since, until)
+            await self.load_missing(keys)
+            records = []
+            for source, date_value in keys:
+                for name, monologue in await self.day_rows(source, date_value):
+                    if host and host not in name.lower():
+                        continue
+                    if text and text not in monologue.lower():
+                        continue
+                    records.append({"source": source, "date": date_value, "name": name, "monologue": monologue})
+            self.cache.put(slice_key, records, sum(len(r["name"]) + len(r["monologue"]) + ROW_OVERHEAD_BYTES for r in records))
+        return len(records), records[offset:offset + limit]
+
+    async def page(self, sources, since, until, offset, limit):
+        # Unfiltered ranges keep only per-day row offsets, so a page builds
+        # records for the days it covers and nothing else.
+        index_key = ("slice", "offsets", tuple(sources), since, until)
+        index = self.cache.get(index_key)
+        if index is None:
+            keys = self.day_keys(sources, since, until)
+            await self.load_missing(keys)
+            starts = [0]
+            for key in keys:
+                starts.append(starts[-1] + len(await self.day_rows(*key)))
+            index = (keys, starts)
+            self.cache.put(index_key, index, 64 * len(keys))
+        keys, starts = index
+        records = []
+        position = bisect.bisect_right(starts, offset) - 1
+        skip = offset - starts[position] if position < len(keys) else 0
+        for source, date_value in keys[position:]:
+            if len(records) >= limit:
+                break
+            rows = await self.day_rows(source, date_value)
+            for name, monologue in rows[skip:skip + limit - len(records)]:
+                records.append({"source": source, "date": date_value, "name": name, "monologue": monologue})
+            skip = 0
+        return starts[-1], records
+
+    def stats(self):
+        return {
+            "days": len(self.days),
+            "generation": self.generation,
+            "reloads": self.reloads,
+            "cache_entries": len(self.cache.entries),
+            "cache_bytes": self.cache.bytes,
+            "cache_max_bytes": self.cache.max_bytes,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_evictions": self.cache.evictions,
+        }
+
+
+def first(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+async def route(store, method, target):
+    if method != "GET":
+        return 405, {"error": "only GET is supported"}
+    url = urlparse(target)
+    query = parse_qs(url.query)
+    parts = [part for part in url.path.split("/") if part]
+
+    if parts == ["stats"]:
+        return 200, store.stats()
+    if parts == ["days"]:
+        sources = query.get("source") or list(SOURCE_NAMES)
+        return 200, {source: store.dates.get(source, []) for source in sources}
+    if len(parts) == 3 and parts[0] == "day":
+        _, source, date_value = parts
+        if (source, date_value) not in store.days:
+            return 404, {"error": f"no day {source}/{date_value}"}
+        rows = await store.day_rows(source, date_value)
+        return 200, {
+            "source": source,
+            "date": date_value,
+            "records": [{"name": name, "monologue": text} for name, text in rows],
+        }
+    if parts == ["records"]:
+        sources = query.get("source") or list(SOURCE_NAMES)
+        unknown = [source for source in sources if source not in SOURCE_NAMES]
+        if unknown:
+            return 400, {"error": f"unknown source {unknown[0]}"}
+        try:
+            limit = min(int(first(query, "limit", DEFAULT_LIMIT)), MAX_LIMIT)
+            offset = int(first(query, "offset", 0))
+        except ValueError:
+            return 400, {"error": "limit and offset must be integers"}
+        if limit < 1 or offset < 0:
+            return 400, {"error": "limit must be at least 1 and offset at least 0"}
+        total, records = await store.records(
+            sources, first(query, "since"), first(query, "until"), first(query, "host"), first(query, "q"),
+            offset=offset, limit=limit,
+        )
+        return 200, {"total": total, "offset": offset, "records": records}
+    return 404, {"error": f"no route for {url.path}"}
+
+
+async def read_request(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    if len(head) > MAX_HEADER_BYTES:
+        raise ValueError("request head too large")
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+
+def keep_alive(version, headers):
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+async def handle_client(store, reader, writer):
+    try:
+        while True:
+            try:
+                method, target, version, headers = await read_request(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            except ValueError:
+                status, payload, persist = 400, {"error": "malformed request"}, False
+            else:
+                persist = keep_alive(version, headers)
+                try:
+                    status, payload = await route(store, method, target)
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[corpus-server] error target={target} reason={type(exc).__name__}: {exc}")
+                    traceback.print_exc()
+                    status, payload = 500, {"error": "internal error"}
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if persist else 'close'}\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+            if not persist:
+                break
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def reload_loop(store, interval):
+    while True:
+        await asyncio.sleep(interval)
+        changed = await store.refresh()
+        if changed:
+            print(f"[corpus-server] reloaded days={changed} generation={store.generation}")
+
+
+async def serve(root=".", host="127.0.0.1", port=DEFAULT_PORT, cache_bytes=DEFAULT_CACHE_MB << 20,
+                reload_seconds=DEFAULT_RELOAD_SECONDS, ready=None):
+    store = CorpusStore(root, cache_bytes)
+    started = time.perf_counter()
+    await store.refresh()
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client(store, reader, writer),
+        host,
+        port,
+        limit=MAX_HEADER_BYTES,
+    )
+    bound = server.sockets[0].getsockname()[1]
+    print(
+        f"[corpus-server] listening=http://{host}:{bound} days={len(store.days)} "
+        f"scan_ms={(time.perf_counter() - started) * 1000:.1f}"
+    )
+    if ready is not None:
+        ready(bound)
+    reloader = asyncio.create_task(reload_loop(store, reload_seconds)) if reload_seconds > 0 else None
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if reloader is not None:
+            reloader.cancel()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Serve the per-day CSV corpus as a read-only JSON API from one warm in-memory cache."
+    )
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_MB, help="Upper bound on cached rows.")
+    parser.add_argument(
+        "--reload-seconds",
+        type=float,
+        default=DEFAULT_RELOAD_SECONDS,
+        help="How often to rescan the tree for new or modified day files (0 disables).",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(
+            serve(
+                root=args.root,
+                host=args.host,
+                port=args.port,
+                cache_bytes=int(args.cache_mb * (1 << 20)),
+                reload_seconds=args.reload_seconds,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from atomic_csv import file_digest, write_bytes_atomic
+from corpus import SOURCE_NAMES, iter_source_files, normalized_rows
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "corpus_stats.npz")
+CACHE_FORMAT = 1
+GROUP_KEYS = ("host", "source", "week", "month", "year", "date")
+METRICS = ("rows", "tokens", "chars", "files")
+
+
+def file_aggregates(path):
+    per_host = {}
+    for name, text in normalized_rows(path):
+        counts = per_host.setdefault(name, [0, 0, 0])
+        counts[0] += 1
+        counts[1] += len(text.split())
+        counts[2] += len(text)
+    return [(name, *counts) for name, counts in per_host.items()]
+
+
+class StatsTable:
+    def __init__(self):
+        self.files = {}
+        self.changed = False
+        self.loaded = False
+        self.build_arrays()
+
+    @classmethod
+    def load(cls, path):
+        table = cls()
+        try:
+            data = np.load(path, allow_pickle=False)
+        except (FileNotFoundError, OSError, ValueError):
+            return table
+        with data:
+            if int(data["format"]) != CACHE_FORMAT:
+                return table
+            hosts = data["hosts"].tolist()
+            entry_file = data["entry_file"]
+            entry_host = data["entry_host"]
+            entry_counts = data["entry_counts"]
+            paths = data["file_path"].tolist()
+            sources = data["file_source"].tolist()
+            dates = data["file_date"].tolist()
+            digests = data["file_digest"].tolist()
+            sizes = data["file_size"].tolist()
+            mtimes = data["file_mtime"].tolist()
+            # Entries are stored grouped by file, so each file is one slice.
+            bounds = np.searchsorted(entry_file, np.arange(len(paths) + 1))
+            for index, path_value in enumerate(paths):
+                start, end = bounds[index], bounds[index + 1]
+                entries = [
+                    (hosts[host], *counts)
+                    for host, counts in zip(
+                        entry_host[start:end].tolist(), entry_counts[start:end].tolist()
+                    )
+                ]
+                table.files[path_value] = {
+                    "source": sources[index],
+                    "date": dates[index],
+                    "digest": digests[index],
+                    "size": sizes[index],
+                    "mtime_ns": mtimes[index],
+                    "entries": entries,
+                }
+        table.loaded = True
+        table.build_arrays()
+        return table
+
+    def refresh(self, root="."):
+        by_digest = {record["digest"]: record["entries"] for record in self.files.values()}
+        files = {}
+        parsed = 0
+        rehashed = 0
+        for source, date_value, path in iter_source_files(root):
+            key = str(path)
+            stat = path.stat()
+            record = self.files.get(key)
+            if (
+                record is not None
+                and record["size"] == stat.st_size
+                and record["mtime_ns"] == stat.st_mtime_ns
+            ):
+                files[key] = record
+                continue
+            digest = file_digest(path)
+            rehashed += 1
+            entries = by_digest.get(digest)
+            if entries is None:
+                entries = file_aggregates(path)
+                by_digest[digest] = entries
+                parsed += 1
+            files[key] = {
+                "source": source,
+                "date": date_value,
+                "digest": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "entries": entries,
+            }
+        removed = len(set(self.files) - set(files))
+        if rehashed or removed:
+            self.changed = True
+        self.files = files
+        self.build_arrays()
+        return {"files": len(files), "rehashed": rehashed, "parsed": parsed, "removed": removed}
+
+    def build_arrays(self):
+        host_index = {}
+        paths = list(self.files)
+        entry_file = []
+        entry_host = []
+        entry_counts = []
+        for index, key in enumerate(paths):
+            for name, rows, tokens, chars in self.files[key]["entries"]:
+                entry_file.append(index)
+                entry_host.append(host_index.setdefault(name, len(host_index)))
+                entry_counts.append((rows, tokens, chars))
+        self.paths = paths
+        self.hosts = list(host_index)
+        self.file_source = np.array(
+            [SOURCE_NAMES.index(self.files[key]["source"]) for key in paths], dtype=np.int8
+        )
+        self.file_date = np.array([self.files[key]["date"] for key in paths], dtype="datetime64[D]")
+        self.entry_file = np.array(entry_file, dtype=np.int32)
+        self.entry_host = np.array(entry_host, dtype=np.int32)
+        self.entry_counts = np.array(entry_counts, dtype=np.int64).reshape(-1, 3)
+
+    def save(self, path):
+        if not self.changed:
+            return False
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            format=np.array(CACHE_FORMAT),
+            hosts=np.array(self.hosts, dtype=str),
+            file_path=np.array(self.paths, dtype=str),
+            file_source=np.array([self.files[key]["source"] for key in self.paths], dtype=str),
+            file_date=np.array([self.files[key]["date"] for key in self.paths], dtype=str),
+            file_digest=np.array([self.files[key]["digest"] for key in self.paths], dtype=str),
+            file_size=np.array([self.files[key]["size"] for key in self.paths], dtype=np.int64),
+            file_mtime=np.array([self.files[key]["mtime_ns"] for key in self.paths], dtype=np.int64),
+            entry_file=self.entry_file,
+            entry_host=self.entry_host,
+            entry_counts=self.entry_counts,
+        )
+        write_bytes_atomic(path, buffer.getvalue())
+        self.changed = False
+        return True
+
+    def period_keys(self, dates, period):
+        if period == "date":
+            return dates.astype(np.int64), lambda value: str(np.datetime64(int(value), "D"))
+        if period == "week":
+            days = dates.astype(np.int64)
+            # 1970-01-01 was a Thursday; shift so weeks start on Monday.
+            mondays = days - (days + 3) % 7
+            return mondays, lambda value: str(np.datetime64(int(value), "D"))
+        unit = "M" if period == "month" else "Y"
+        values = dates.astype(f"datetime64[{unit}]").astype(np.int64)
+        return values, lambda value: str(np.datetime64(int(value), unit))
+
+    def host_mask(self, patterns):
+        lowered = [pattern.lower() for pattern in patterns]
+        selected = np.array(
+            [any(pattern in host.lower() for pattern in lowered) for host in self.hosts], dtype=bool
+        )
+        return selected[self.entry_host] if len(self.hosts) else np.zeros(0, dtype=bool)
+
+    def rollup(self, by=("host",), hosts=None, sources=None, since=None, until=None):
+        dates = self.file_date[self.entry_file]
+        mask = np.ones(len(self.entry_file), dtype=bool)
+        if hosts:
+            mask &= self.host_mask(hosts)
+        if sources:
+            codes = [SOURCE_NAMES.index(source) for source in sources]
+            mask &= np.isin(self.file_source[self.entry_file], codes)
+        if since:
+            mask &= dates >= np.datetime64(since, "D")
+        if until:
+            mask &= dates <= np.datetime64(until, "D")
+
+        columns = []
+        labels = []
+        for key in by:
+            if key == "host":
+                columns.append(self.entry_host[mask].astype(np.int64))
+                labels.append(lambda value: self.hosts[int(value)])
+            elif key == "source":
+                columns.append(self.file_source[self.entry_file[mask]].astype(np.int64))
+                labels.append(lambda value: SOURCE_NAMES[int(value)])
+            else:
+                values, label = self.period_keys(dates[mask], key)
+                columns.append(values)
+                labels.append(label)
+
+        counts = self.entry_counts[mask]
+        files = self.entry_file[mask]
+        if columns:
+            groups, inverse = np.unique(np.stack(columns, axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+        else:
+            groups = np.zeros((1, 0), dtype=np.int64)
+            inverse = np.zeros(len(counts), dtype=np.int64)
+        size = len(groups)
+        sums = [np.bincount(inverse, weights=counts[:, column], minlength=size) for column in range(3)]
+        # A file counts once per group even when several hosts appear in it.
+        pairs = np.unique(np.stack([inverse, files.astype(np.int64)], axis=1), axis=0)
+        file_counts = np.bincount(pairs[:, 0], minlength=size) if len(pairs) else np.zeros(size)
+        total_rows = sums[0].sum()
+
+        results = []
+        for index in range(size):
+            rows = int(sums[0][index])
+            if not rows:
+                continue
+            record = {key: labels[position](groups[index][position]) for position, key in enumerate(by)}
+            record.update(
+                {
+                    "rows": rows,
+                    "tokens": int(sums[1][index]),
+                    "chars": int(sums[2][index]),
+                    "files": int(file_counts[index]),
+                    "avg_tokens": round(sums[1][index] / rows, 2),
+                    "avg_chars": round(sums[2][index] / rows, 2),
+                    "share": round(rows / total_rows, 4),
+                }
+            )
+            results.append(record)
+        return results
+
+
+def load_stats(cache_path=DEFAULT_CACHE_PATH, root=".", refresh=True):
+    table = StatsTable.load(cache_path)
+    report = None
+    if refresh:
+        report = table.refresh(root)
+        table.save(cache_path)
+    return table, report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Roll up per-day corpus aggregates by host, source and period."
+    )
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="Answer from the cache only, without checking the CSV tree for changes.",
+    )
+    parser.add_argument("--by", nargs="*", choices=GROUP_KEYS, default=["host"])
+    parser.add_argument("--host", nargs="+", default=None, help="Case-insensitive host name substrings.")
+    parser.add_argument("--sources", nargs="+", choices=SOURCE_NAMES, default=None)
+    parser.add_argument("--since", default=None, help="YYYY-MM-DD, inclusive.")
+    parser.add_argument("--until", default=None, help="YYYY-MM-DD, inclusive.")
+    parser.add_argument("--sort", choices=(*GROUP_KEYS, *METRICS), default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print JSON lines instead of a TSV table.")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.sort in GROUP_KEYS and args.sort not in args.by:
+        parser.error(f"--sort {args.sort} needs {args.sort} in --by")
+    started = time.perf_counter()
+    table, report = load_stats(args.cache, args.root, refresh=not args.no_refresh)
+    if args.no_refresh and not table.loaded:
+        print(f"[stats] no usable cache at {args.cache}; run without --no-refresh first", file=sys.stderr)
+        return 1
+    if report is not None:
+        print(
+            f"[stats] files={report['files']} rehashed={report['rehashed']} "
+            f"parsed={report['parsed']} removed={report['removed']}",
+            file=sys.stderr,
+        )
+
+    results = table.rollup(
+        by=args.by, hosts=args.host, sources=args.sources, since=args.since, until=args.until
+    )
+    if args.sort:
+        reverse = args.sort in METRICS
+        results.sort(key=lambda record: record[args.sort], reverse=reverse)
+    if args.limit is not None:
+        results = results[: args.limit]
+
+    if args.json:
+        for record in results:
+            print(json.dumps(record, ensure_ascii=False))
+    else:
+        columns = [*args.by, "rows", "tokens", "chars", "files", "avg_tokens", "avg_chars", "share"]
+        print("\t".join(columns))
+        for record in results:
+            print("\t".join(str(record[column]) for column in columns))
+    print(f"[stats] groups={len(results)} seconds={time.perf_counter() - started:.3f}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from atomic_csv import FIELDNAMES, file_digest, write_bytes_atomic
+from corpus import HOST_ALIASES, KNOWN_HOSTS, SOURCE_NAMES, canonical_host, iter_source_files
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "validate.json")
+# Bump when a check changes so cached results are recomputed.
+RULES_VERSION = 1
+MIN_TEXT_CHARS = 20
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+NOISE_RE = re.compile(
+    r"\baired on (?:january|february|march|april|may|june|july|august|september|october"
+    r"|november|december) \d{1,2}, \d{4}"
+    r"|^(?:main segment|other segments):"
+    r"|^the daily show ?,"
+    r"|^\* \* \*",
+    re.IGNORECASE,
+)
+NOISE_NAMES = {"Main Segment", "Segment", "Announcer", "Commercial"}
+ERROR_CODES = {"filename", "date-mismatch", "utf8", "csv", "header", "columns", "empty-file", "empty-text", "empty-name"}
+
+
+def issue(code, line=None, detail=""):
+    return {
+        "code": code,
+        "severity": "error" if code in ERROR_CODES else "warning",
+        "line": line,
+        "detail": detail,
+    }
+
+
+def text_hash(text):
+    return hashlib.blake2b(" ".join(text.split()).lower().encode("utf-8"), digest_size=8).hexdigest()
+
+
+def check_filename(source, date_value, path):
+    issues = []
+    if not DATE_RE.match(date_value):
+        return [issue("filename", detail=f"{date_value!r} is not YYYY-MM-DD")]
+    try:
+        parsed = date.fromisoformat(date_value)
+    except ValueError as exc:
+        return [issue("filename", detail=str(exc))]
+    if parsed > date.today():
+        issues.append(issue("date-mismatch", detail="date is in the future"))
+    parent = os.path.basename(os.path.dirname(path))
+    if source == "newsmax" and parent.isdigit() and parent != date_value[:4]:
+        issues.append(issue("date-mismatch", detail=f"filed under {parent}/"))
+    return issues
+
+
+def check_file(task):
+    source, date_value, path = task
+    issues = check_filename(source, date_value, path)
+    with open(path, "rb") as fh:
+        payload = fh.read()
+    try:
+        content = payload.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        line = payload[: exc.start].count(b"\n") + 1
+        issues.append(issue("utf8", line=line, detail=f"byte {exc.start}: {exc.reason}"))
+        content = payload.decode("utf-8", errors="replace")
+
+    hashes = []
+    reader = csv.reader(io.StringIO(content, newline=""))
+    try:
+        header = next(reader, None)
+    except csv.Error as exc:
+        issues.append(issue("csv", line=reader.line_num, detail=str(exc)))
+        return issues, hashes
+    if header is None:
+        issues.append(issue("empty-file"))
+        return issues, hashes
+    if header != FIELDNAMES:
+        issues.append(issue("header", line=1, detail=f"got {header}"))
+
+    seen = {}
+    rows = 0
+    while True:
+        try:
+            row = next(reader, None)
+        except csv.Error as exc:
+            # e.g. a field over csv.field_size_limit(); the rest of the file is unreadable.
+            issues.append(issue("csv", line=reader.line_num, detail=str(exc)))
+            return issues, hashes
+        if row is None:
+            break
+        line = reader.line_num
+        if not any(field.strip() for field in row):
+            continue
+        rows += 1
+        if len(row) != len(FIELDNAMES):
+            issues.append(issue("columns", line=line, detail=f"{len(row)} fields"))
+            continue
+        name, text = row[0].strip(), " ".join(row[1].split())
+        if not name:
+            issues.append(issue("empty-name", line=line))
+        if not text:
+            issues.append(issue("empty-text", line=line))
+            continue
+        if len(text) < MIN_TEXT_CHARS:
+            issues.append(issue("short-text", line=line, detail=text))
+        if NOISE_RE.search(text) or name in NOISE_NAMES:
+            issues.append(issue("noise", line=line, detail=text[:80]))
+        if name:
+            canonical = canonical_host(name)
+            if canonical is None:
+                issues.append(issue("unknown-host", line=line, detail=name))
+            elif canonical != name:
+                issues.append(issue("non-canonical-host", line=line, detail=f"{name} -> {canonical}"))
+        digest = text_hash(text)
+        if digest in seen:
+            issues.append(issue("duplicate-in-file", line=line, detail=f"same as line {seen[digest]}"))
+        else:
+            seen[digest] = line
+            hashes.append([digest, line])
+    if rows == 0:
+        issues.append(issue("empty-file"))
+    return issues, hashes
+
+
+def iter_checked(tasks, workers, chunksize):
+    if workers <= 1:
+        yield from map(check_file, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(check_file, tasks, chunksize=chunksize)
+
+
+def load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            cache = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if any(cache.get(name) != value for name, value in cache_rules().items()):
+        return {}
+    return cache.get("files", {})
+
+
+def cache_rules():
+    # Host checks depend on both tables, so editing either invalidates the cache.
+    return {
+        "rules": RULES_VERSION,
+        "known_hosts": sorted(KNOWN_HOSTS),
+        "host_aliases": sorted([alias, host] for alias, host in HOST_ALIASES.items()),
+    }
+
+
+def save_cache(path, files):
+    payload = {**cache_rules(), "files": files}
+    write_bytes_atomic(path, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def validate(root=".", sources=None, cache_path=DEFAULT_CACHE_PATH, workers=1, chunksize=16):
+    cached = load_cache(cache_path) if cache_path else {}
+    files = {}
+    pending = []
+    rehashed = 0
+    for source, date_value, path in iter_source_files(root, sources):
+        key = str(path)
+        stat = path.stat()
+        record = cached.get(key)
+        if record is not None and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            files[key] = record
+            continue
+        digest = file_digest(path)
+        rehashed += 1
+        if record is not None and record["digest"] == digest:
+            record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            files[key] = record
+            continue
+        files[key] = {"source": source, "digest": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        pending.append((source, date_value, key))
+
+    for (_, _, key), (issues, hashes) in zip(pending, iter_checked(pending, workers, chunksize)):
+        files[key].update(issues=issues, hashes=hashes)
+
+    # Cross-file duplicates are recomputed every run from the cached hashes.
+    first_seen = {}
+    results = {}
+    for key, record in files.items():
+        issues = list(record["issues"])
+        for digest, line in record["hashes"]:
+            if digest in first_seen:
+                other, other_line = first_seen[digest]
+                issues.append(issue("duplicate-cross-file", line=line, detail=f"same as {other}:{other_line}"))
+            else:
+                first_seen[digest] = (key, line)
+        results[key] = issues
+
+    if cache_path and (pending or rehashed or set(cached) - set(files)):
+        if sources and set(sources) != set(SOURCE_NAMES):
+            files = {**{k: v for k, v in cached.items() if v.get("source") not in sources}, **files}
+        save_cache(cache_path, files)
+    return results, {"files": len(results), "rehashed": rehashed, "checked": len(pending)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Check every source CSV for schema, encoding, content and duplicate problems."
+    )
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument("--sources", nargs="+", choices=SOURCE_NAMES, default=None)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Per-file result cache ('' disables).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument("--ignore", nargs="+", default=[], help="Issue codes to leave out.")
+    parser.add_argument("--max-per-code", type=int, default=20, help="Printed issues per code (0 = all).")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero on warnings too.")
+    parser.add_argument("--json", action="store_true", help="Print every issue as a JSON line.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    results, report = validate(
+        root=args.root, sources=args.sources, cache_path=args.cache, workers=args.workers, chunksize=args.chunksize
+    )
+
+    counts = Counter()
+    severities = Counter()
+    for path, issues in results.items():
+        for item in issues:
+            if item["code"] in args.ignore:
+                continue
+            counts[item["code"]] += 1
+            severities[item["severity"]] += 1
+            if args.json:
+                print(json.dumps({"file": path, **item}, ensure_ascii=False))
+            elif not args.max_per_code or counts[item["code"]] <= args.max_per_code:
+                location = f"{path}:{item['line']}" if item["line"] else path
+                print(f"[{item['severity']}] {item['code']} {location} {item['detail']}".rstrip())
+
+    for code, count in sorted(counts.items()):
+        print(f"[validate] code={code} count={count}", file=sys.stderr)
+    print(
+        f"Summary: files={report['files']} checked={report['checked']} rehashed={report['rehashed']} "
+        f"errors={severities['error']} warnings={severities['warning']} "
+        f"seconds={time.perf_counter() - started:.2f}",
+        file=sys.stderr,
+    )
+    if severities["error"] or (args.strict and severities["warning"]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
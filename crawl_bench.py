@@ -0,0 +1,153 @@
+import argparse
+import json
+import resource
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_server import add_fault_arguments, faults_from_args, start_in_thread
+
+REPO_DIR = Path(__file__).resolve().parent
+SOURCES = ("newsmax", "latenighter", "scraps")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def crawler_command(source, base, output_dir, metrics_path, args):
+    if source == "newsmax":
+        command = [
+            "newsmax_crawler.py",
+            "--base-url", f"{base}/jokes/{{page}}",
+            "--archive-url", f"{base}/jokes/archive/",
+            "--start-page", "1",
+            "--end-page", str(args.newsmax_pages),
+            "--stop-after-same-date", str(args.newsmax_pages + 1),
+            "--sleep", "0",
+            "--timeout", str(args.timeout),
+            "--name-cache", "",
+        ]
+    else:
+        command = [
+            f"{source}_crawler.py",
+            "--api-url", f"{base}/{source}/wp-json/wp/v2/posts",
+            "--from-date", "2000-01-01",
+        ]
+    command += [
+        "--output-dir", str(output_dir),
+        "--overwrite-existing",
+        "--metrics-jsonl", str(metrics_path),
+    ]
+    command += shlex.split(getattr(args, f"{source}_args") or "")
+    return [sys.executable, *command]
+
+
+def read_fetch_latencies(metrics_path):
+    latencies = []
+    if not metrics_path.exists():
+        return latencies
+    with metrics_path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            record = json.loads(line)
+            if record.get("event") == "fetch":
+                latencies.append(record["seconds"])
+    return sorted(latencies)
+
+
+def child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_source(source, base, work_dir, args):
+    output_dir = work_dir / source
+    metrics_path = work_dir / f"{source}.metrics.jsonl"
+    command = crawler_command(source, base, output_dir, metrics_path, args)
+    cpu_before = child_cpu_seconds()
+    started = time.perf_counter()
+    completed = subprocess.run(
+        command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall = time.perf_counter() - started
+    cpu = child_cpu_seconds() - cpu_before
+    if completed.returncode != 0:
+        print(completed.stderr, file=sys.stderr)
+
+    latencies = read_fetch_latencies(metrics_path)
+    pages = len(latencies)
+    return {
+        "source": source,
+        "returncode": completed.returncode,
+        "pages": pages,
+        "files": sum(1 for _ in output_dir.rglob("*.csv")) if output_dir.exists() else 0,
+        "wall_seconds": round(wall, 3),
+        "pages_per_second": round(pages / wall, 2) if wall else 0.0,
+        "fetch_p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "fetch_p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "cpu_ms_per_page": round(cpu * 1000 / pages, 2) if pages else 0.0,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run each crawler end to end against the local stand-in server "
+            "and report throughput, fetch latency and CPU per page."
+        )
+    )
+    parser.add_argument("--root", default=str(REPO_DIR), help="CSV tree the stand-in server renders from.")
+    parser.add_argument("--recordings", default=None)
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=list(SOURCES))
+    parser.add_argument("--newsmax-pages", type=int, default=200)
+    parser.add_argument("--timeout", type=int, default=5, help="Newsmax client timeout in seconds.")
+    parser.add_argument("--repeat", type=int, default=1)
+    for source in SOURCES:
+        parser.add_argument(
+            f"--{source}-args",
+            default="",
+            help=f"Extra arguments appended to the {source} crawler command line.",
+        )
+    parser.add_argument("--json", default=None, help="Also write results to this JSON file.")
+    add_fault_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = start_in_thread(
+        root=args.root, faults=faults_from_args(args), recordings=args.recordings
+    )
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = []
+    try:
+        for run in range(args.repeat):
+            for source in args.sources:
+                with tempfile.TemporaryDirectory(prefix=f"bench-{source}-") as tmp:
+                    result = run_source(source, base, Path(tmp), args)
+                result["run"] = run + 1
+                results.append(result)
+                print(
+                    f"[bench] source={source} run={run + 1} pages={result['pages']} "
+                    f"files={result['files']} pages/s={result['pages_per_second']} "
+                    f"p50={result['fetch_p50_ms']}ms p99={result['fetch_p99_ms']}ms "
+                    f"cpu/page={result['cpu_ms_per_page']}ms rc={result['returncode']}"
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 1 if any(result["returncode"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
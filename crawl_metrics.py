@@ -0,0 +1,225 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+_NULL_TIMER = nullcontext()
+COUNTER_HELP = {
+    "bytes": "Response or output bytes processed.",
+    "rows": "Monologue rows parsed or written.",
+    "retries": "HTTP requests retried.",
+    "fetch_errors": "Fetches that failed after all retries.",
+    "rate_limited": "Responses with HTTP 429.",
+    "not_found": "Responses with HTTP 404.",
+    "cache_hits": "Responses served from the HTTP cache.",
+    "name_cache_hits": "Comedian names resolved from the name cache.",
+    "name_cache_misses": "Comedian names resolved by the name rules.",
+    "duplicates": "Rows already present in the database.",
+    "duplicates_dropped": "Rows dropped as duplicates of the corpus.",
+    "db_rows": "Rows inserted by the database sink.",
+    "db_duplicates": "Rows the database sink skipped as duplicates.",
+    "db_batches": "Batches flushed by the database sink.",
+    "posts_ignored": "Posts with no monologue for the date range.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        # Past the last bucket: report its bound, since JSON has no infinity.
+        return self.buckets[-1]
+
+
+def counter_help(name):
+    # pages_saved -> "Pages saved.", days_duplicate -> "Days duplicate."
+    return name.replace("_", " ").capitalize() + "."
+
+
+class CrawlMetrics:
+    enabled = True
+
+    def __init__(self, source, jsonl_path=None, prom_path=None):
+        self.source = source
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.prom_path = Path(prom_path) if prom_path else None
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.monotonic()
+        self.hooks = []
+        self._jsonl = None
+        if self.jsonl_path is not None:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            self._jsonl = self.jsonl_path.open("a", encoding="utf-8")
+
+    def observe(self, phase, seconds):
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = Histogram()
+        histogram.observe(seconds)
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def attach(self, hook):
+        self.hooks.append(hook)
+        hook.start()
+
+    @contextmanager
+    def timer(self, phase, **fields):
+        for hook in self.hooks:
+            hook.enter_phase(phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in reversed(self.hooks):
+                hook.exit_phase(phase)
+            self.observe(phase, elapsed)
+            if self._jsonl is not None:
+                self.event(phase, seconds=round(elapsed, 6), **fields)
+
+    def event(self, kind, **fields):
+        if self._jsonl is None:
+            return
+        record = {"ts": round(time.time(), 3), "source": self.source, "event": kind}
+        record.update(fields)
+        self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def rows_per_second(self):
+        elapsed = time.monotonic() - self.started
+        if elapsed <= 0:
+            return 0.0
+        return self.counters.get("rows", 0) / elapsed
+
+    def summary(self):
+        summary = {
+            "elapsed_seconds": round(time.monotonic() - self.started, 3),
+            "rows_per_second": round(self.rows_per_second(), 2),
+        }
+        summary.update(self.counters)
+        for phase, histogram in sorted(self.histograms.items()):
+            summary[f"{phase}_count"] = histogram.count
+            summary[f"{phase}_seconds"] = round(histogram.total, 3)
+            summary[f"{phase}_p50"] = histogram.quantile(0.5)
+            summary[f"{phase}_p99"] = histogram.quantile(0.99)
+        return summary
+
+    def render_prometheus(self):
+        label = f'source="{self.source}"'
+        lines = [
+            "# HELP monologue_phase_seconds Crawl phase latency in seconds.",
+            "# TYPE monologue_phase_seconds histogram",
+        ]
+        for phase, histogram in sorted(self.histograms.items()):
+            running = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                running += count
+                lines.append(
+                    f'monologue_phase_seconds_bucket{{{label},phase="{phase}",le="{bound}"}} {running}'
+                )
+            lines.append(
+                f'monologue_phase_seconds_bucket{{{label},phase="{phase}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'monologue_phase_seconds_sum{{{label},phase="{phase}"}} {histogram.total:.6f}')
+            lines.append(f'monologue_phase_seconds_count{{{label},phase="{phase}"}} {histogram.count}')
+        for name, value in sorted(self.counters.items()):
+            help_text = COUNTER_HELP.get(name) or counter_help(name)
+            lines.append(f"# HELP monologue_{name}_total {help_text}")
+            lines.append(f"# TYPE monologue_{name}_total counter")
+            lines.append(f"monologue_{name}_total{{{label}}} {value}")
+        lines.append("# HELP monologue_rows_per_second Rows per second over the whole run.")
+        lines.append("# TYPE monologue_rows_per_second gauge")
+        lines.append(f"monologue_rows_per_second{{{label}}} {self.rows_per_second():.3f}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        for hook in self.hooks:
+            hook.stop()
+        self.hooks = []
+        self.event("summary", **self.summary())
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+        if self.prom_path is not None:
+            self.prom_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.prom_path.with_name(self.prom_path.name + ".tmp")
+            tmp_path.write_text(self.render_prometheus(), encoding="utf-8")
+            # Scrapers must never see a half-written exposition file.
+            tmp_path.replace(self.prom_path)
+
+
+class NullMetrics:
+    enabled = False
+
+    def observe(self, phase, seconds):
+        pass
+
+    def incr(self, name, amount=1):
+        pass
+
+    def timer(self, phase, **fields):
+        return _NULL_TIMER
+
+    def event(self, kind, **fields):
+        pass
+
+    def summary(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument(
+        "--metrics-jsonl",
+        default=None,
+        help="Append per-phase timing events and a final summary to this JSON-lines file.",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        default=None,
+        help="Write Prometheus text-format metrics to this file when the run ends.",
+    )
+
+
+def metrics_from_args(source, args):
+    profile_dir = getattr(args, "profile", None)
+    if not (args.metrics_jsonl or args.metrics_prom or profile_dir):
+        return NULL_METRICS
+    metrics = CrawlMetrics(source, jsonl_path=args.metrics_jsonl, prom_path=args.metrics_prom)
+    if profile_dir:
+        from crawl_profile import CrawlProfiler
+
+        metrics.attach(CrawlProfiler(source, profile_dir, interval=args.profile_interval))
+    return metrics
@@ -0,0 +1,361 @@
+import argparse
+import importlib
+import shlex
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlparse
+
+CRAWLERS = {
+    "newsmax": "newsmax_crawler",
+    "latenighter": "latenighter_crawler",
+    "scraps": "scraps_crawler",
+}
+# Attributes of each crawler's parsed args holding the URLs it will fetch.
+URL_ARGS = {
+    "newsmax": ("base_url", "archive_url"),
+    "latenighter": ("api_url",),
+    "scraps": ("api_url",),
+}
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MIN_INTERVAL = 0.0
+DEFAULT_PROGRESS_SECONDS = 10.0
+# Per-source outputs that must not be shared when several sources run.
+OUTPUT_OPTIONS = ("output_dir", "metrics_prom", "metrics_jsonl")
+
+
+def polite_adapter_class():
+    from requests.adapters import HTTPAdapter
+
+    class PoliteAdapter(HTTPAdapter):
+        def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, **kwargs):
+            self.min_interval = min_interval
+            self._next_request = 0.0
+            self._lock = threading.Lock()
+            self.requests_sent = 0
+            self.waited_seconds = 0.0
+            super().__init__(**kwargs)
+
+        def send(self, request, **kwargs):
+            with self._lock:
+                now = time.monotonic()
+                wait = max(0.0, self._next_request - now)
+                self._next_request = max(now, self._next_request) + self.min_interval
+                self.requests_sent += 1
+                self.waited_seconds += wait
+            if wait:
+                time.sleep(wait)
+            return super().send(request, **kwargs)
+
+    return PoliteAdapter
+
+
+def host_prefix(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+def make_session(hosts=(), pool_size=DEFAULT_POOL_SIZE, min_interval=DEFAULT_MIN_INTERVAL, host_intervals=None):
+    import requests
+
+    PoliteAdapter = polite_adapter_class()
+    session = requests.Session()
+    adapters = {}
+    # A separate adapter per host gives each host its own pool and its own
+    # politeness clock; unknown hosts fall back to the default adapter.
+    default = PoliteAdapter(min_interval=0.0, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", default)
+    session.mount("https://", default)
+    for prefix in dict.fromkeys(hosts):
+        interval = (host_intervals or {}).get(urlparse(prefix).hostname, min_interval)
+        adapter = PoliteAdapter(min_interval=interval, pool_connections=1, pool_maxsize=pool_size)
+        session.mount(prefix, adapter)
+        adapters[prefix] = adapter
+    session.polite_adapters = adapters
+    return session
+
+
+def source_hosts(source, args):
+    prefixes = []
+    for name in URL_ARGS[source]:
+        url = getattr(args, name, None)
+        if url:
+            prefixes.append(host_prefix(url.format(page=1) if "{page}" in url else url))
+    return prefixes
+
+
+def option_names(tokens):
+    return {token.split("=", 1)[0] for token in tokens if token.startswith("--")}
+
+
+def parse_source_args(parser, namespace, sources, rest):
+    parsed = {}
+    unknown_by_source = {}
+    for source in sources:
+        module = importlib.import_module(CRAWLERS[source])
+        source_parser = module.build_parser()
+        source_parser.prog = f"monologue crawl {source}"
+        extra = shlex.split(getattr(namespace, f"{source}_args") or "")
+        if len(sources) == 1:
+            parsed[source] = (module, source_parser.parse_args(rest + extra))
+            continue
+        # Shared options go to every source that understands them.
+        args, unknown = source_parser.parse_known_args(rest)
+        args = source_parser.parse_args(extra, namespace=args)
+        unknown_by_source[source] = option_names(unknown)
+        parsed[source] = (module, args)
+    if unknown_by_source:
+        rejected = set.intersection(*unknown_by_source.values())
+        if rejected:
+            parser.error(f"no selected source accepts {', '.join(sorted(rejected))}")
+    for option in OUTPUT_OPTIONS:
+        owners = defaultdict(list)
+        for source, (_, args) in parsed.items():
+            value = getattr(args, option, None)
+            if value:
+                owners[Path(value).resolve()].append(source)
+        for sources_sharing in owners.values():
+            if len(sources_sharing) > 1:
+                parser.error(
+                    f"--{option.replace('_', '-')} would be shared by {' and '.join(sources_sharing)}; "
+                    "give each source its own with --<source>-args"
+                )
+    profiled = [source for source, (_, args) in parsed.items() if getattr(args, "profile", None)]
+    if profiled and len(parsed) > 1:
+        # tracemalloc and the cProfile hook are process-wide, so concurrent
+        # profilers would stop each other and mix their allocations.
+        parser.error(
+            f"--profile ({', '.join(profiled)}) works with one source at a time; "
+            "profile each crawler in its own run"
+        )
+    return parsed
+
+
+def shared_fingerprints(parsed):
+    from corpus_fingerprints import fingerprints_from_args
+
+    # One set per fingerprint file, loaded (or built) once before any crawl
+    # starts, so a row saved by one source is a duplicate for the others.
+    sets = {}
+    handles = {}
+    for source, (_, args) in parsed.items():
+        if not getattr(args, "dedupe", False):
+            continue
+        key = Path(args.fingerprints).resolve()
+        if key not in sets:
+            sets[key] = fingerprints_from_args(args)
+        handles[source] = sets[key].scope()
+    return handles
+
+
+class SourceOutput:
+    def __init__(self, stream):
+        self.stream = stream
+        self.sources = {}
+        self.counts = defaultdict(Counter)
+        self.partial = {}
+        self.lock = threading.Lock()
+
+    def register(self, thread, source):
+        # Called from the crawl thread itself, before it prints anything.
+        self.sources[thread.ident] = source
+
+    def write(self, text):
+        source = self.sources.get(threading.get_ident())
+        if source is None:
+            return self.stream.write(text)
+        with self.lock:
+            buffered = self.partial.pop(source, "") + text
+            lines = buffered.split("\n")
+            if lines[-1]:
+                self.partial[source] = lines[-1]
+            for line in lines[:-1]:
+                if line.startswith("[") and "]" in line:
+                    self.counts[source][line[1:line.index("]")]] += 1
+                self.stream.write(f"{source:<11} | {line}\n")
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            for source, line in self.partial.items():
+                self.stream.write(f"{source:<11} | {line}\n")
+            self.partial.clear()
+        self.stream.flush()
+
+
+def run_sources(parsed, session, progress_seconds=DEFAULT_PROGRESS_SECONDS, fingerprints=None, stop=None):
+    results = {}
+    finished = set()
+    output = SourceOutput(sys.stdout)
+    started = time.perf_counter()
+    fingerprints = fingerprints or {}
+    stop = stop or threading.Event()
+
+    concurrent = len(parsed) > 1
+
+    def worker(source, module, args):
+        if concurrent:
+            output.register(threading.current_thread(), source)
+        source_started = time.perf_counter()
+        # Anything that escapes run(), SystemExit included, is a failure.
+        summary, error = {}, "exited"
+        try:
+            summary = module.run(args, session, fingerprints=fingerprints.get(source), stop=stop) or {}
+            error = None
+        except Exception as exc:  # noqa: BLE001
+            error = f"{type(exc).__name__}: {exc}"
+            print(f"[error] reason={error}")
+            print(traceback.format_exc().rstrip())
+        finally:
+            results[source] = {
+                "summary": summary,
+                "seconds": time.perf_counter() - source_started,
+                "error": error,
+                "stopped": stop.is_set(),
+            }
+            finished.add(source)
+
+    threads = []
+    for source, (module, args) in parsed.items():
+        # Daemon threads so a second Ctrl-C exits without waiting for them.
+        thread = threading.Thread(
+            target=worker, args=(source, module, args), name=f"crawl-{source}", daemon=True
+        )
+        threads.append((source, thread))
+
+    if concurrent:
+        sys.stdout = output
+    try:
+        for source, thread in threads:
+            thread.start()
+        next_progress = time.monotonic() + progress_seconds
+        # Polled rather than joined: a Ctrl-C landing inside Thread.join()
+        # can leave is_alive() reporting False for a thread still running.
+        while len(finished) < len(threads):
+            try:
+                time.sleep(0.2)
+            except KeyboardInterrupt:
+                if stop.is_set():
+                    raise
+                stop.set()
+                output.stream.write("[stop] finishing current pages; Ctrl-C again to exit now\n")
+                output.stream.flush()
+                continue
+            if concurrent and progress_seconds > 0 and time.monotonic() >= next_progress:
+                next_progress += progress_seconds
+                parts = []
+                for source, _ in threads:
+                    counts = output.counts[source]
+                    state = "done" if source in finished else "running"
+                    done = " ".join(f"{kind}={count}" for kind, count in sorted(counts.items()))
+                    parts.append(f"{source}:{state} {done}".rstrip())
+                elapsed = time.perf_counter() - started
+                output.stream.write(f"[progress] elapsed={elapsed:.1f}s " + " | ".join(parts) + "\n")
+    finally:
+        if concurrent:
+            output.flush()
+            sys.stdout = output.stream
+    return results, time.perf_counter() - started
+
+
+def report(results, wall_seconds, session=None):
+    for source, result in results.items():
+        fields = " ".join(
+            f"{key}={value}" for key, value in result["summary"].items() if key != "source"
+        )
+        if result["error"]:
+            status = f"error={result['error']!r}"
+        else:
+            status = "stopped" if result["stopped"] else "ok"
+        print(f"[summary] source={source} seconds={result['seconds']:.1f} status={status} {fields}".rstrip())
+    for prefix, adapter in getattr(session, "polite_adapters", {}).items():
+        print(
+            f"[host] prefix={prefix} requests={adapter.requests_sent} "
+            f"min_interval={adapter.min_interval} waited={adapter.waited_seconds:.1f}s"
+        )
+    source_seconds = [result["seconds"] for result in results.values()]
+    print(
+        f"Summary: sources={len(results)} failed={sum(1 for r in results.values() if r['error'])} "
+        f"wall_seconds={wall_seconds:.1f} slowest_source_seconds={max(source_seconds, default=0):.1f} "
+        f"sum_source_seconds={sum(source_seconds):.1f}"
+    )
+
+
+def parse_host_intervals(values):
+    intervals = {}
+    for value in values:
+        host, _, seconds = value.partition("=")
+        intervals[host] = float(seconds)
+    return intervals
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description=(
+            "Crawl several sources at once in one process. Options after the "
+            "source names go to every source that accepts them; use "
+            "--<source>-args for source-specific ones."
+        ),
+    )
+    parser.add_argument("sources", nargs="+", choices=list(CRAWLERS))
+    for source in CRAWLERS:
+        parser.add_argument(f"--{source}-args", default="", help=f"Extra arguments for the {source} crawler only.")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="Keep-alive connections kept per host.",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help="Minimum seconds between request starts to the same host.",
+    )
+    parser.add_argument(
+        "--host-interval",
+        nargs="+",
+        default=[],
+        metavar="HOST=SECONDS",
+        help="Per-host --min-interval overrides, e.g. www.newsmax.com=0.5.",
+    )
+    parser.add_argument(
+        "--progress-seconds",
+        type=float,
+        default=DEFAULT_PROGRESS_SECONDS,
+        help="How often to print a combined progress line (0 disables).",
+    )
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    namespace, rest = parser.parse_known_args(argv)
+    sources = list(dict.fromkeys(namespace.sources))
+    parsed = parse_source_args(parser, namespace, sources, rest)
+    hosts = [prefix for source, (_, args) in parsed.items() for prefix in source_hosts(source, args)]
+
+    fingerprints = shared_fingerprints(parsed)
+    stop = threading.Event()
+
+    with make_session(
+        hosts,
+        pool_size=namespace.pool_size,
+        min_interval=namespace.min_interval,
+        host_intervals=parse_host_intervals(namespace.host_interval),
+    ) as session:
+        results, wall_seconds = run_sources(
+            parsed, session, progress_seconds=namespace.progress_seconds, fingerprints=fingerprints, stop=stop
+        )
+        report(results, wall_seconds, session)
+    if any(result["error"] for result in results.values()):
+        return 1
+    return 130 if stop.is_set() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+TOP_ALLOCATIONS = 25
+RUN_PHASE = "run"
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class CrawlProfiler:
+    def __init__(self, source, output_dir, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.source = source
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.profiles = {}
+        self.phase_stack = [RUN_PHASE]
+        self.samples = Counter()
+        self.thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_tracemalloc = False
+
+    def _profile(self, phase):
+        profile = self.profiles.get(phase)
+        if profile is None:
+            profile = self.profiles[phase] = cProfile.Profile()
+        return profile
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name=f"{self.source}-sampler", daemon=True
+        )
+        self._sampler.start()
+        self._profile(RUN_PHASE).enable()
+
+    def enter_phase(self, phase):
+        # Only one deterministic profiler can be active per thread, so the
+        # outer phase is paused while the inner one records.
+        self._profile(self.phase_stack[-1]).disable()
+        self.phase_stack.append(phase)
+        self._profile(phase).enable()
+
+    def exit_phase(self, phase):
+        self._profile(self.phase_stack.pop()).disable()
+        self._profile(self.phase_stack[-1]).enable()
+
+    def _sample_loop(self):
+        own_file = os.path.abspath(__file__)
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                if os.path.abspath(frame.f_code.co_filename) != own_file:
+                    stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.append(self.phase_stack[-1])
+            self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._profile(self.phase_stack[-1]).disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+        snapshot = None
+        if tracemalloc.is_tracing():
+            # Snapshot before writing reports so their allocations don't show up.
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        combined = None
+        for phase, profile in sorted(self.profiles.items()):
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:
+                # pstats refuses profiles that never recorded a call.
+                continue
+            path = self.output_dir / f"{self.source}.{phase}.pstats"
+            stats.dump_stats(path)
+            written.append(path)
+            if combined is None:
+                combined = pstats.Stats(str(path))
+            else:
+                combined.add(str(path))
+        if combined is not None:
+            path = self.output_dir / f"{self.source}.pstats"
+            combined.dump_stats(path)
+            written.append(path)
+
+        path = self.output_dir / f"{self.source}.collapsed"
+        with path.open("w", encoding="utf-8") as fh:
+            for stack, count in sorted(self.samples.items()):
+                fh.write(f"{stack} {count}\n")
+        written.append(path)
+
+        if snapshot is not None:
+            path = self.output_dir / f"{self.source}.alloc.txt"
+            with path.open("w", encoding="utf-8") as fh:
+                fh.write(f"peak_bytes={peak}\n")
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                    fh.write(f"{stat}\n")
+            written.append(path)
+
+        for path in written:
+            print(f"[profile] file={path}")
+        return written
+
+
+def add_profile_arguments(parser):
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="DIR",
+        help=(
+            "Write per-phase pstats, a collapsed-stack flamegraph file and "
+            "top tracemalloc allocation sites into DIR."
+        ),
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=DEFAULT_SAMPLE_INTERVAL,
+        help="Stack sampling interval in seconds for the flamegraph output.",
+    )
@@ -0,0 +1,577 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+DEFAULT_DB_PATH = ".cache/crawl_queue.sqlite3"
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 5.0
+DEFAULT_MIN_INTERVAL = 0.1
+POLL_SECONDS = 1.0
+SOURCES = ("newsmax", "latenighter", "scraps")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id              INTEGER PRIMARY KEY,
+    source          TEXT NOT NULL,
+    key             TEXT NOT NULL,
+    payload         TEXT NOT NULL,
+    state           TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    available_at    REAL NOT NULL DEFAULT 0,
+    lease_owner     TEXT,
+    lease_expires   REAL,
+    last_error      TEXT,
+    updated         REAL,
+    UNIQUE(source, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, available_at);
+CREATE TABLE IF NOT EXISTS source_options (
+    source          TEXT PRIMARY KEY,
+    options         TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    source          TEXT PRIMARY KEY,
+    next_at         REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scraps_quotes (
+    tag_order       INTEGER NOT NULL,
+    page            INTEGER NOT NULL,
+    seq             INTEGER NOT NULL,
+    date            TEXT NOT NULL,
+    author          TEXT NOT NULL,
+    quote           TEXT NOT NULL,
+    PRIMARY KEY (tag_order, page, seq)
+);
+"""
+
+
+def connect(db_path):
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    # Autocommit mode; writers take explicit BEGIN IMMEDIATE locks below so
+    # several processes (or hosts sharing the file) serialize cleanly.
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def write_transaction(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def enqueue(conn, source, keys_and_payloads):
+    now = time.time()
+    added = 0
+    with write_transaction(conn):
+        for key, payload in keys_and_payloads:
+            # Finished jobs are re-armed so the same range can be crawled
+            # again; pending and leased ones are left alone.
+            cursor = conn.execute(
+                "INSERT INTO jobs (source, key, payload, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(source, key) DO UPDATE SET state = 'pending', attempts = 0, "
+                "available_at = 0, last_error = NULL, payload = excluded.payload, "
+                "updated = excluded.updated WHERE state IN ('done', 'dead')",
+                (source, key, json.dumps(payload), now),
+            )
+            added += cursor.rowcount
+    return added
+
+
+def set_source_options(conn, source, options):
+    with write_transaction(conn):
+        conn.execute(
+            "INSERT OR REPLACE INTO source_options (source, options) VALUES (?, ?)",
+            (source, json.dumps(options)),
+        )
+
+
+def get_source_options(conn, source):
+    row = conn.execute(
+        "SELECT options FROM source_options WHERE source = ?", (source,)
+    ).fetchone()
+    return json.loads(row[0]) if row else {}
+
+
+def lease_job(conn, owner, lease_seconds, max_attempts, sources=None):
+    now = time.time()
+    source_filter = ""
+    params = [now, now]
+    if sources:
+        source_filter = f" AND source IN ({','.join('?' for _ in sources)})"
+        params.extend(sources)
+    with write_transaction(conn):
+        conn.execute(
+            "UPDATE jobs SET state = 'dead', last_error = COALESCE(last_error, 'lease expired'), "
+            "updated = ? WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, max_attempts),
+        )
+        row = conn.execute(
+            "SELECT id, source, key, payload, attempts FROM jobs "
+            "WHERE ((state = 'pending' AND available_at <= ?) "
+            "OR (state = 'leased' AND lease_expires < ?))"
+            + source_filter
+            + " ORDER BY id LIMIT 1",
+            params,
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, source, key, payload, attempts = row
+        conn.execute(
+            "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+            "attempts = attempts + 1, updated = ? WHERE id = ?",
+            (owner, now + lease_seconds, now, job_id),
+        )
+    return SimpleNamespace(
+        id=job_id, source=source, key=key, payload=json.loads(payload), attempts=attempts + 1
+    )
+
+
+def complete_job(conn, job, owner):
+    with write_transaction(conn):
+        conn.execute(
+            "UPDATE jobs SET state = 'done', lease_owner = NULL, lease_expires = NULL, "
+            "last_error = NULL, updated = ? WHERE id = ? AND lease_owner = ?",
+            (time.time(), job.id, owner),
+        )
+
+
+def fail_job(conn, job, owner, error, max_attempts, backoff):
+    now = time.time()
+    if job.attempts >= max_attempts:
+        state, available_at = "dead", now
+    else:
+        state, available_at = "pending", now + backoff * 2 ** (job.attempts - 1)
+    with write_transaction(conn):
+        conn.execute(
+            "UPDATE jobs SET state = ?, available_at = ?, lease_owner = NULL, "
+            "lease_expires = NULL, last_error = ?, updated = ? "
+            "WHERE id = ? AND lease_owner = ?",
+            (state, available_at, error, now, job.id, owner),
+        )
+    return state
+
+
+def acquire_rate_slot(conn, source, min_interval):
+    if min_interval <= 0:
+        return
+    with write_transaction(conn):
+        now = time.time()
+        row = conn.execute(
+            "SELECT next_at FROM rate_limits WHERE source = ?", (source,)
+        ).fetchone()
+        slot = max(now, row[0]) if row else now
+        conn.execute(
+            "INSERT OR REPLACE INTO rate_limits (source, next_at) VALUES (?, ?)",
+            (source, slot + min_interval),
+        )
+    delay = slot - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def outstanding_jobs(conn, sources=None):
+    return count_jobs(conn, ("pending", "leased"), sources)
+
+
+def dead_jobs(conn, sources=None):
+    return count_jobs(conn, ("dead",), sources)
+
+
+def count_jobs(conn, job_states, sources=None):
+    query = f"SELECT COUNT(*) FROM jobs WHERE state IN ({','.join('?' for _ in job_states)})"
+    params = list(job_states)
+    if sources:
+        query += f" AND source IN ({','.join('?' for _ in sources)})"
+        params.extend(sources)
+    return conn.execute(query, params).fetchone()[0]
+
+
+def queue_status(conn):
+    return conn.execute(
+        "SELECT source, state, COUNT(*) FROM jobs GROUP BY source, state ORDER BY source, state"
+    ).fetchall()
+
+
+def date_range(options, parse_date_range):
+    return parse_date_range(
+        SimpleNamespace(from_date=options["from_date"], to_date=options.get("to_date"))
+    )
+
+
+def run_newsmax_job(conn, session, job, state):
+    import newsmax_crawler
+
+    options = get_source_options(conn, "newsmax")
+    args = newsmax_crawler.build_parser().parse_args([])
+    args.output_dir = options.get("output_dir", args.output_dir)
+    args.skip_existing = options.get("skip_existing", True)
+    args.timeout = options.get("timeout", args.timeout)
+    args.retries = options.get("retries", args.retries)
+    args.base_url = options.get("url") or args.base_url
+    if "name_cache" not in state:
+        state["name_cache"] = newsmax_crawler.NameCache(
+            args.name_cache, fingerprint=newsmax_crawler.name_rules_fingerprint()
+        ).load()
+
+    page = job.payload["page"]
+    status, date_value, path = newsmax_crawler.crawl_page(
+        session, page, args, name_cache=state["name_cache"]
+    )
+    if status == "missing":
+        print(f"[missing] page={page}")
+    else:
+        print(f"[{status}] page={page} date={date_value} file={path}")
+    return status
+
+
+def run_latenighter_job(conn, session, job, state):
+    import latenighter_crawler
+
+    options = get_source_options(conn, "latenighter")
+    args = SimpleNamespace(
+        output_dir=options.get("output_dir", "latenighter"),
+        skip_existing=options.get("skip_existing", True),
+    )
+    from_date, to_date = date_range(options, latenighter_crawler.parse_date_range)
+    page = job.payload["page"]
+    posts, total_pages = latenighter_crawler.fetch_posts_page(
+        session,
+        latenighter_crawler.MONOLOGUES_TAG_ID,
+        page,
+        api_url=options.get("url") or latenighter_crawler.WP_POSTS_API,
+    )
+    if page == 1 and total_pages > 1:
+        enqueue(conn, "latenighter", [(f"page:{n}", {"page": n}) for n in range(2, total_pages + 1)])
+
+    statuses = defaultdict(int)
+    for post in posts:
+        result = latenighter_crawler.crawl_post(post, args, from_date, to_date)
+        latenighter_crawler.report_post(*result)
+        statuses[result[0]] += 1
+    return " ".join(f"{key}={value}" for key, value in sorted(statuses.items())) or "empty"
+
+
+def run_scraps_job(conn, session, job, state):
+    import scraps_crawler
+
+    options = get_source_options(conn, "scraps")
+    from_date, to_date = date_range(options, scraps_crawler.parse_date_range)
+    tag_id = job.payload["tag"]
+    page = job.payload["page"]
+    tag_order = list(scraps_crawler.TAG_CONFIG).index(tag_id)
+    posts, total_pages = scraps_crawler.fetch_posts_page(
+        session, tag_id, page, api_url=options.get("url") or scraps_crawler.WP_POSTS_API
+    )
+    if page == 1 and total_pages > 1:
+        enqueue(
+            conn,
+            "scraps",
+            [(f"{tag_id}:{n}", {"tag": tag_id, "page": n}) for n in range(2, total_pages + 1)],
+        )
+
+    rows = []
+    for post in posts:
+        date_value, quotes = scraps_crawler.collect_post_quotes(
+            post, scraps_crawler.TAG_CONFIG[tag_id], from_date, to_date
+        )
+        if not quotes:
+            continue
+        for author, entries in quotes.items():
+            for quote in entries:
+                rows.append((tag_order, page, len(rows), date_value, author, quote))
+
+    # Day files can combine several tags, so results are staged and written
+    # by finalize_scraps() once every scraps job is done.
+    with write_transaction(conn):
+        conn.execute(
+            "DELETE FROM scraps_quotes WHERE tag_order = ? AND page = ?", (tag_order, page)
+        )
+        conn.executemany("INSERT INTO scraps_quotes VALUES (?, ?, ?, ?, ?, ?)", rows)
+    return f"staged={len(rows)}"
+
+
+JOB_HANDLERS = {
+    "newsmax": run_newsmax_job,
+    "latenighter": run_latenighter_job,
+    "scraps": run_scraps_job,
+}
+
+
+def finalize_scraps(conn, force=False):
+    import scraps_crawler
+
+    if outstanding_jobs(conn, ["scraps"]):
+        print("[finalize] scraps jobs still outstanding; not writing day files yet")
+        return False
+    dead = dead_jobs(conn, ["scraps"])
+    if dead and not force:
+        # A dead page means some days are missing quotes; writing them now
+        # would overwrite complete files with partial ones.
+        print(
+            f"[finalize] scraps has {dead} dead job(s); run requeue-dead and work again, "
+            "or finalize --force to write partial days"
+        )
+        return False
+    options = get_source_options(conn, "scraps")
+    if not options:
+        return False
+    day_quotes = defaultdict(lambda: defaultdict(list))
+    for date_value, author, quote in conn.execute(
+        "SELECT date, author, quote FROM scraps_quotes ORDER BY tag_order, page, seq"
+    ):
+        day_quotes[date_value][author].append(quote)
+
+    args = SimpleNamespace(
+        output_dir=options.get("output_dir", "scraps"),
+        skip_existing=options.get("skip_existing", True),
+    )
+    saved, skipped, unchanged, _ = scraps_crawler.write_days(day_quotes, args)
+    pruned = 0
+    if options.get("prune_stale") and not dead:
+        from_date, to_date = date_range(options, scraps_crawler.parse_date_range)
+        pruned = scraps_crawler.prune_stale_days(args.output_dir, day_quotes, from_date, to_date)
+    if not dead:
+        # Staged rows are kept while any job is dead so a later requeue can
+        # still finalize complete days.
+        with write_transaction(conn):
+            conn.execute("DELETE FROM scraps_quotes")
+            conn.execute("DELETE FROM source_options WHERE source = 'scraps'")
+    print(
+        f"[finalize] scraps saved={saved} skipped={skipped} "
+        f"unchanged={unchanged} pruned={pruned} dead={dead}"
+    )
+    return True
+
+
+def worker_main(db_path, worker_index, options):
+    import requests
+
+    owner = f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+    conn = connect(db_path)
+    session = requests.Session()
+    state = {}
+    counts = defaultdict(int)
+    while True:
+        job = lease_job(
+            conn,
+            owner,
+            lease_seconds=options["lease_seconds"],
+            max_attempts=options["max_attempts"],
+            sources=options["sources"],
+        )
+        if job is None:
+            if not outstanding_jobs(conn, options["sources"]):
+                break
+            # Other workers hold live leases; wait in case they expire.
+            time.sleep(POLL_SECONDS)
+            continue
+
+        acquire_rate_slot(conn, job.source, options["min_interval"].get(job.source, DEFAULT_MIN_INTERVAL))
+        try:
+            result = JOB_HANDLERS[job.source](conn, session, job, state)
+        except Exception as exc:  # noqa: BLE001
+            error = f"{type(exc).__name__}: {exc}"
+            new_state = fail_job(
+                conn, job, owner, error, options["max_attempts"], options["backoff"]
+            )
+            counts[new_state] += 1
+            print(f"[{new_state}] worker={owner} job={job.source}/{job.key} reason={error}")
+            if new_state == "dead":
+                traceback.print_exc()
+            continue
+        complete_job(conn, job, owner)
+        counts["done"] += 1
+        print(f"[done] worker={owner} job={job.source}/{job.key} result={result}")
+
+    if "name_cache" in state:
+        state["name_cache"].save()
+    conn.close()
+    print(
+        f"[worker] {owner} "
+        + " ".join(f"{key}={value}" for key, value in sorted(counts.items()))
+    )
+
+
+def parse_min_intervals(values):
+    intervals = {}
+    for value in values or []:
+        source, _, seconds = value.partition("=")
+        if source not in SOURCES or not seconds:
+            raise ValueError(f"--min-interval expects SOURCE=SECONDS, got {value!r}")
+        intervals[source] = float(seconds)
+    return intervals
+
+
+def cmd_enqueue(conn, args):
+    options = {
+        "output_dir": args.output_dir or args.source,
+        "skip_existing": not args.overwrite_existing,
+        "url": args.url,
+    }
+    if args.source == "newsmax":
+        if args.start_page is None or args.end_page is None:
+            raise ValueError("newsmax needs --start-page and --end-page")
+        options.update(timeout=args.timeout, retries=args.retries)
+        jobs = [(str(page), {"page": page}) for page in range(args.start_page, args.end_page + 1)]
+    elif args.source == "latenighter":
+        # Page 1 discovers X-WP-TotalPages and enqueues the remaining pages.
+        options.update(from_date=args.from_date or "2018-09-29", to_date=args.to_date)
+        jobs = [("page:1", {"page": 1})]
+    else:
+        import scraps_crawler
+
+        options.update(
+            from_date=args.from_date or "2017-01-01",
+            to_date=args.to_date,
+            prune_stale=args.prune_stale,
+        )
+        jobs = [(f"{tag}:1", {"tag": tag, "page": 1}) for tag in scraps_crawler.TAG_CONFIG]
+    set_source_options(conn, args.source, options)
+    added = enqueue(conn, args.source, jobs)
+    print(f"[enqueue] source={args.source} added={added} requested={len(jobs)}")
+
+
+def cmd_work(conn, args):
+    options = {
+        "lease_seconds": args.lease_seconds,
+        "max_attempts": args.max_attempts,
+        "backoff": args.backoff,
+        "sources": args.sources or None,
+        "min_interval": parse_min_intervals(args.min_interval),
+    }
+    started = time.monotonic()
+    workers = [
+        multiprocessing.Process(target=worker_main, args=(args.db, index, options))
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    if not args.sources or "scraps" in args.sources:
+        if conn.execute("SELECT 1 FROM scraps_quotes LIMIT 1").fetchone():
+            finalize_scraps(conn)
+    print(f"Summary: workers={args.workers} elapsed={elapsed:.1f}s")
+    cmd_status(conn, args)
+
+
+def cmd_status(conn, args):
+    for source, state, count in queue_status(conn):
+        print(f"{source:12} {state:8} {count}")
+
+
+def cmd_requeue_dead(conn, args):
+    with write_transaction(conn):
+        cursor = conn.execute(
+            "UPDATE jobs SET state = 'pending', attempts = 0, available_at = 0, updated = ? "
+            "WHERE state = 'dead'",
+            (time.time(),),
+        )
+    print(f"[requeue] jobs={cursor.rowcount}")
+
+
+def cmd_dead(conn, args):
+    for source, key, attempts, error, updated in conn.execute(
+        "SELECT source, key, attempts, last_error, updated FROM jobs WHERE state = 'dead' ORDER BY id"
+    ):
+        stamp = datetime.fromtimestamp(updated).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{source}/{key} attempts={attempts} at={stamp} error={error}")
+
+
+def cmd_finalize(conn, args):
+    finalize_scraps(conn, force=args.force)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "SQLite-backed crawl work queue with leases, retries and "
+            "dead-lettering, drained by several worker processes."
+        )
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add crawl jobs for one source.")
+    enqueue_parser.add_argument("source", choices=SOURCES)
+    enqueue_parser.add_argument("--start-page", type=int, default=None)
+    enqueue_parser.add_argument("--end-page", type=int, default=None)
+    enqueue_parser.add_argument("--from-date", default=None)
+    enqueue_parser.add_argument("--to-date", default=None)
+    enqueue_parser.add_argument("--output-dir", default=None)
+    enqueue_parser.add_argument(
+        "--url",
+        default=None,
+        help="Override the Newsmax page template or WordPress posts API URL.",
+    )
+    enqueue_parser.add_argument("--overwrite-existing", action="store_true")
+    enqueue_parser.add_argument("--prune-stale", action="store_true")
+    enqueue_parser.add_argument("--timeout", type=int, default=20)
+    enqueue_parser.add_argument("--retries", type=int, default=3)
+    enqueue_parser.set_defaults(handler=cmd_enqueue)
+
+    work_parser = subparsers.add_parser("work", help="Drain the queue with worker processes.")
+    work_parser.add_argument("--workers", type=int, default=4)
+    work_parser.add_argument("--sources", nargs="*", choices=SOURCES, default=None)
+    work_parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    work_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    work_parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_SECONDS)
+    work_parser.add_argument(
+        "--min-interval",
+        action="append",
+        metavar="SOURCE=SECONDS",
+        help=(
+            "Minimum spacing between requests to one source, shared by all "
+            f"workers using this queue file (default {DEFAULT_MIN_INTERVAL}s)."
+        ),
+    )
+    work_parser.set_defaults(handler=cmd_work)
+
+    for name, handler, help_text in [
+        ("status", cmd_status, "Show job counts by source and state."),
+        ("dead", cmd_dead, "List dead-lettered jobs."),
+        ("requeue-dead", cmd_requeue_dead, "Move dead-lettered jobs back to pending."),
+    ]:
+        subparsers.add_parser(name, help=help_text).set_defaults(handler=handler)
+
+    finalize_parser = subparsers.add_parser("finalize", help="Write staged scraps day files.")
+    finalize_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Write day files even if some scraps jobs are dead (no pruning; staged rows are kept).",
+    )
+    finalize_parser.set_defaults(handler=cmd_finalize)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    conn = connect(args.db)
+    try:
+        args.handler(conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
+import argparse
 import csv
 import os
 from random import shuffle
-import psycopg2
 
+from corpus import iter_source_files
+from crawl_metrics import NULL_METRICS, add_metrics_arguments, metrics_from_args
+from crawl_profile import add_profile_arguments
+from db_sink import connect_string_from_env
+
+
+def csv2sql(dirname, filename, source_name, connect_str, metrics=NULL_METRICS):
+    import psycopg2
 
-def csv2sql(dirname, filename, source_name, connect_str):
     conn = psycopg2.connect(connect_str)
     cur = conn.cursor()
     with open(os.path.join(dirname, filename), "r", encoding="utf-8", newline="") as csvfile:
@@ -13,61 +20,56 @@ def csv2sql(dirname, filename, source_name, connect_str):
             "values (%s, %s, %s, %s)"
         )
         date = filename[:-4]
-        rows = list(csv.DictReader(csvfile))
+        with metrics.timer("parse", file=filename):
+            rows = list(csv.DictReader(csvfile))
+        metrics.incr("bytes", csvfile.tell())
         shuffle(rows)
-        for row in rows:
-            try:
-                cur.execute(
-                    sql,
-                    (
-                        row["name"],
-                        date,
-                        source_name,
-                        row["monologue"].strip(),
-                    ),
-                )
-            except psycopg2.IntegrityError as e:
-                conn.rollback()
-                print(dirname, filename, "existed")
-                print(row['name'], row['monologue'])
-                continue
-            except Exception:
-                conn.rollback()
-                print(dirname, filename)
-                raise
-            conn.commit()
+        with metrics.timer("write", file=filename, rows=len(rows)):
+            for row in rows:
+                try:
+                    cur.execute(
+                        sql,
+                        (
+                            row["name"],
+                            date,
+                            source_name,
+                            row["monologue"].strip(),
+                        ),
+                    )
+                except psycopg2.IntegrityError as e:
+                    conn.rollback()
+                    metrics.incr("duplicates")
+                    print(dirname, filename, "existed")
+                    print(row['name'], row['monologue'])
+                    continue
+                except Exception:
+                    conn.rollback()
+                    print(dirname, filename)
+                    raise
+                conn.commit()
+                metrics.incr("rows")
     conn.close()
 
 
-if __name__ == '__main__':
-    user = os.environ.get("MONOLOGUE_DB_USER", "")
-    password = os.environ.get("MONOLOGUE_DB_PASSWORD", user)
-    dbname = os.environ.get("MONOLOGUE_DB_NAME", user)
-    host = os.environ.get("MONOLOGUE_DB_HOST", "localhost")
-    connect_str = (
-        f"dbname={dbname} user={user} password={password} host='{host}'"
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Import all source CSV files into the monologue table."
     )
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    metrics = metrics_from_args("csv2sql", args)
+
+    connect_str = connect_string_from_env()
 
     # csv2sql("newsmax", "2017-07-10.csv", connect_str)
     # raise SystemExit(0)
-    source_dirs = {}
+    try:
+        for source_name, _, path in iter_source_files("."):
+            csv2sql(str(path.parent), path.name, source_name, connect_str, metrics=metrics)
+    finally:
+        metrics.close()
 
-    if os.path.isdir("newsmax"):
-        year_dirs = []
-        for entry in sorted(os.listdir("newsmax")):
-            path = os.path.join("newsmax", entry)
-            if os.path.isdir(path) and entry.isdigit() and len(entry) == 4:
-                year_dirs.append(path)
-        source_dirs["newsmax"] = year_dirs + ["newsmax"]
 
-    if os.path.isdir("latenighter"):
-        source_dirs["latenighter"] = ["latenighter"]
-
-    if os.path.isdir("scraps"):
-        source_dirs["scraps"] = ["scraps"]
-
-    for source_name, directories in source_dirs.items():
-        for dirname in directories:
-            for filename in sorted(os.listdir(dirname)):
-                if filename.endswith(".csv"):
-                    csv2sql(dirname, filename, source_name, connect_str)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import csv
+import io
+import os
+import queue
+import threading
+import time
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_SECONDS = 1.0
+STAGING_TABLE = "monologue_staging"
+_STOP = object()
+
+
+def connect_string_from_env():
+    user = os.environ.get("MONOLOGUE_DB_USER", "")
+    password = os.environ.get("MONOLOGUE_DB_PASSWORD", user)
+    dbname = os.environ.get("MONOLOGUE_DB_NAME", user)
+    host = os.environ.get("MONOLOGUE_DB_HOST", "localhost")
+    return f"dbname={dbname} user={user} password={password} host='{host}'"
+
+
+class DatabaseSink:
+    def __init__(self, source, connect_str, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.source = source
+        self.connect_str = connect_str
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        # Bounded so a slow database applies backpressure instead of
+        # buffering the whole crawl in memory.
+        self.queue = queue.Queue(maxsize=batch_size * 8)
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.batches = 0
+        self.error = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name=f"{self.source}-db-sink", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def put(self, date_value, rows_by_name):
+        if self.error is not None:
+            return
+        for name, entries in rows_by_name.items():
+            for entry in entries:
+                self.queue.put((name, date_value, self.source, entry.strip()))
+
+    def close(self):
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        status = f"error={self.error}" if self.error else "ok"
+        print(
+            f"[db-sink] source={self.source} inserted={self.inserted} "
+            f"duplicates={self.duplicates} failed={self.failed} "
+            f"batches={self.batches} status={status}"
+        )
+
+    def report(self, metrics):
+        metrics.incr("db_rows", self.inserted)
+        metrics.incr("db_duplicates", self.duplicates)
+        metrics.incr("db_batches", self.batches)
+
+    def _run(self):
+        try:
+            import psycopg2
+
+            conn = psycopg2.connect(self.connect_str)
+        except Exception as exc:  # noqa: BLE001
+            self._fail(exc)
+            return
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"CREATE TEMP TABLE {STAGING_TABLE} "
+                    "(author varchar(20), date date, source varchar(20), content text) "
+                    "ON COMMIT DELETE ROWS"
+                )
+            conn.commit()
+
+            batch = []
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+                if item is not None:
+                    batch.append(item)
+                if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                    self._flush(conn, batch)
+                    batch = []
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_seconds
+            if batch:
+                self._flush(conn, batch)
+        except Exception as exc:  # noqa: BLE001
+            self._fail(exc)
+        finally:
+            conn.close()
+
+    def _fail(self, exc):
+        self.error = f"{type(exc).__name__}: {exc}"
+        print(
+            f"[db-sink] error source={self.source} reason={self.error} "
+            "(database writes stopped; CSV output continues)",
+            flush=True,
+        )
+        self._drain()
+
+    def _drain(self):
+        # Keep producers unblocked after a fatal error; CSV output continues.
+        while self.queue.get() is not _STOP:
+            pass
+
+    def _flush(self, conn, batch):
+        import psycopg2
+
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(batch)
+        buffer.seek(0)
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {STAGING_TABLE} (author, date, source, content) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                cur.execute(
+                    "INSERT INTO monologue (author, date, source, content) "
+                    f"SELECT author, date, source, content FROM {STAGING_TABLE} "
+                    "ON CONFLICT (content) DO NOTHING"
+                )
+                inserted = cur.rowcount
+            conn.commit()
+        except psycopg2.DataError:
+            # One bad row (e.g. an over-long author) fails the whole COPY;
+            # retry row by row so the rest of the batch still lands.
+            conn.rollback()
+            self._flush_rows(conn, batch)
+            return
+        self.batches += 1
+        self.inserted += inserted
+        self.duplicates += len(batch) - inserted
+
+    def _flush_rows(self, conn, batch):
+        import psycopg2
+
+        for row in batch:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "INSERT INTO monologue (author, date, source, content) "
+                        "VALUES (%s, %s, %s, %s) ON CONFLICT (content) DO NOTHING",
+                        row,
+                    )
+                    inserted = cur.rowcount
+                conn.commit()
+            except psycopg2.DataError as exc:
+                conn.rollback()
+                self.failed += 1
+                print(f"[db-sink] rejected date={row[1]} author={row[0]} reason={exc}")
+                continue
+            self.inserted += inserted
+            self.duplicates += 1 - inserted
+        self.batches += 1
+
+
+def add_db_sink_arguments(parser):
+    parser.add_argument(
+        "--db-sink",
+        action="store_true",
+        help=(
+            "Also stream parsed rows into the Postgres monologue table from a "
+            "background writer (MONOLOGUE_DB_* environment variables)."
+        ),
+    )
+    parser.add_argument("--db-batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+
+def sink_from_args(source, args):
+    if not getattr(args, "db_sink", False):
+        return None
+    return DatabaseSink(
+        source, connect_string_from_env(), batch_size=args.db_batch_size
+    ).start()
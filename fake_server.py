@@ -0,0 +1,334 @@
+import argparse
+import csv
+import html
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from scraps_crawler import TAG_CONFIG
+
+LATENIGHTER_TAG_ID = 180
+DEFAULT_PORT = 8800
+DEFAULT_STALL_SECONDS = 40.0
+NEWSMAX_PAGE_RE = re.compile(r"^/jokes/(\d+)/?$")
+WP_POSTS_RE = re.compile(r"^/(latenighter|scraps)/wp-json/wp/v2/posts/?$")
+
+
+def read_rows(path):
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        return [
+            ((row.get("name") or "").strip(), (row.get("monologue") or "").strip())
+            for row in csv.DictReader(fh)
+        ]
+
+
+def render_newsmax_page(date_value, rows):
+    date_text = datetime.strptime(date_value, "%Y-%m-%d").strftime("%A %b %d %Y")
+    parts = [
+        "<!DOCTYPE html><html><head><title>Best of Late Nite Jokes</title></head><body>",
+        f'<div class="jokesDate">{date_text}</div>',
+        '<div class="jokespage">',
+    ]
+    current = None
+    for name, joke in rows:
+        if name != current:
+            current = name
+            slug = name.replace(" ", "").replace("'", "")
+            parts.append(
+                '<div class="jokesHeader">'
+                f'<img alt="{html.escape(name)}" src="/images/newsmax_jokes_personalities_{slug}.jpg">'
+                "</div>"
+            )
+        parts.append(f"<p>{html.escape(joke)}</p>")
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def render_latenighter_content(rows):
+    parts = []
+    current = None
+    for name, quote in rows:
+        if name != current:
+            current = name
+            parts.append(f"<h3>{html.escape(name)}</h3>")
+        parts.append(f"<blockquote><p>“{html.escape(quote)}”</p></blockquote>")
+    return "".join(parts)
+
+
+def render_scraps_content(rows):
+    return "".join(f"<p>{html.escape(quote)}</p>" for _, quote in rows)
+
+
+class Corpus:
+    def __init__(self, root, recordings=None):
+        root = Path(root)
+        self.recorded_pages = {}
+        if recordings:
+            for path in (Path(recordings) / "newsmax").glob("*.html"):
+                if path.stem.isdigit():
+                    self.recorded_pages[int(path.stem)] = path
+        self.newsmax_pages = sorted(
+            (path for path in (root / "newsmax").rglob("*.csv")), key=lambda path: path.stem
+        )
+        self.latenighter_files = sorted((root / "latenighter").glob("*.csv"), reverse=True)
+
+        author_tags = {}
+        for tag_id, config in TAG_CONFIG.items():
+            author_tags.setdefault(config["author"], tag_id)
+        self.scraps_posts = {tag_id: [] for tag_id in TAG_CONFIG}
+        for path in sorted((root / "scraps").glob("*.csv"), reverse=True):
+            by_author = {}
+            for name, quote in read_rows(path):
+                by_author.setdefault(name, []).append((name, quote))
+            for author, rows in by_author.items():
+                tag_id = author_tags.get(author)
+                if tag_id is not None:
+                    self.scraps_posts[tag_id].append((path.stem, rows))
+
+    def latest_newsmax_page(self):
+        return max([len(self.newsmax_pages), *self.recorded_pages])
+
+    def newsmax_page(self, page):
+        if page in self.recorded_pages:
+            return self.recorded_pages[page].read_text(encoding="utf-8")
+        if not 1 <= page <= len(self.newsmax_pages):
+            return None
+        path = self.newsmax_pages[page - 1]
+        return render_newsmax_page(path.stem, read_rows(path))
+
+    def wp_posts(self, source, tag_id):
+        if source == "latenighter":
+            if tag_id != LATENIGHTER_TAG_ID:
+                return []
+            return [(path.stem, None, path) for path in self.latenighter_files]
+        return [(date_value, rows, None) for date_value, rows in self.scraps_posts.get(tag_id, [])]
+
+    def render_wp_post(self, source, tag_id, index, date_value, rows, path):
+        if source == "latenighter":
+            title = f"Monologues Round-Up {date_value}"
+            content = render_latenighter_content(read_rows(path))
+        else:
+            keyword = TAG_CONFIG[tag_id]["title_keywords"][0]
+            title = f"{keyword.title()} – Transcript"
+            content = render_scraps_content(rows)
+        return {
+            "id": tag_id * 100000 + index,
+            "date": f"{date_value}T12:00:00",
+            "link": f"https://example.invalid/{source}/{date_value}-{index}/",
+            "title": {"rendered": html.escape(title)},
+            "content": {"rendered": content},
+        }
+
+
+class FaultConfig:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_404=0.0, rate_429=0.0,
+                 rate_timeout=0.0, stall_seconds=DEFAULT_STALL_SECONDS, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_404 = rate_404
+        self.rate_429 = rate_429
+        self.rate_timeout = rate_timeout
+        self.stall_seconds = stall_seconds
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms))
+            roll = self.random.random()
+        if roll < self.rate_timeout:
+            return delay, "timeout"
+        roll -= self.rate_timeout
+        if roll < self.rate_404:
+            return delay, 404
+        roll -= self.rate_404
+        if roll < self.rate_429:
+            return delay, 429
+        return delay, None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    corpus = None
+    faults = FaultConfig()
+    per_page_default = 10
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        delay_ms, fault = self.faults.draw()
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        if fault == "timeout":
+            # Hold the connection open past the client's timeout, then drop it.
+            time.sleep(self.faults.stall_seconds)
+            self.close_connection = True
+            return
+        if fault == 404:
+            self.send_body(404, "not found", "text/plain")
+            return
+        if fault == 429:
+            self.send_body(429, "slow down", "text/plain", {"Retry-After": "1"})
+            return
+
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == "/jokes/archive":
+            latest = self.corpus.latest_newsmax_page()
+            self.send_response(302)
+            self.send_header("Location", f"/jokes/{latest}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        match = NEWSMAX_PAGE_RE.match(url.path)
+        if match:
+            body = self.corpus.newsmax_page(int(match.group(1)))
+            if body is None:
+                self.send_body(404, "not found", "text/plain")
+            else:
+                self.send_body(200, body, "text/html; charset=UTF-8")
+            return
+
+        match = WP_POSTS_RE.match(url.path)
+        if match:
+            self.serve_wp_posts(match.group(1), parse_qs(url.query))
+            return
+
+        self.send_body(404, "not found", "text/plain")
+
+    def serve_wp_posts(self, source, query):
+        try:
+            tag_id = int(query.get("tags", ["0"])[0])
+            per_page = int(query.get("per_page", [str(self.per_page_default)])[0])
+            page = int(query.get("page", ["1"])[0])
+        except ValueError:
+            self.send_body(400, json.dumps({"code": "rest_invalid_param"}), "application/json")
+            return
+
+        posts = self.corpus.wp_posts(source, tag_id)
+        total = len(posts)
+        total_pages = max(1, -(-total // per_page))
+        if page > total_pages:
+            self.send_body(
+                400, json.dumps({"code": "rest_post_invalid_page_number"}), "application/json"
+            )
+            return
+        start = (page - 1) * per_page
+        rendered = [
+            self.corpus.render_wp_post(source, tag_id, start + offset, *post)
+            for offset, post in enumerate(posts[start:start + per_page])
+        ]
+        self.send_body(
+            200,
+            json.dumps(rendered, ensure_ascii=False),
+            "application/json; charset=UTF-8",
+            {"X-WP-Total": str(total), "X-WP-TotalPages": str(total_pages)},
+        )
+
+
+def make_server(root=".", host="127.0.0.1", port=DEFAULT_PORT, faults=None, recordings=None):
+    handler = type(
+        "ConfiguredStandInHandler",
+        (StandInHandler,),
+        {"corpus": Corpus(root, recordings=recordings), "faults": faults or FaultConfig()},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_in_thread(root=".", host="127.0.0.1", port=0, faults=None, recordings=None):
+    server = make_server(root=root, host=host, port=port, faults=faults, recordings=recordings)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-server", daemon=True)
+    thread.start()
+    return server
+
+
+def add_fault_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-404", type=float, default=0.0, help="Share of requests answered 404.")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered 429.")
+    parser.add_argument(
+        "--rate-timeout",
+        type=float,
+        default=0.0,
+        help="Share of requests stalled for --stall-seconds and then dropped.",
+    )
+    parser.add_argument("--stall-seconds", type=float, default=DEFAULT_STALL_SECONDS)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def faults_from_args(args):
+    return FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_404=args.rate_404,
+        rate_429=args.rate_429,
+        rate_timeout=args.rate_timeout,
+        stall_seconds=args.stall_seconds,
+        seed=args.seed,
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve Newsmax /jokes pages and WordPress posts API responses "
+            "rendered from the local CSV tree, with optional fault injection."
+        )
+    )
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument(
+        "--recordings",
+        default=None,
+        help="Directory with recorded newsmax/<page>.html files served instead of rendered pages.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_fault_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = make_server(
+        root=args.root,
+        host=args.host,
+        port=args.port,
+        faults=faults_from_args(args),
+        recordings=args.recordings,
+    )
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"newsmax:     --base-url {base}/jokes/{{page}} --archive-url {base}/jokes/archive/")
+    print(f"latenighter: --api-url {base}/latenighter/wp-json/wp/v2/posts")
+    print(f"scraps:      --api-url {base}/scraps/wp-json/wp/v2/posts")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
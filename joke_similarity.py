@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from atomic_csv import write_bytes_atomic
+from corpus import SOURCE_NAMES, normalized_rows
+from corpus_features import DEFAULT_FEATURES_DIR, build as build_features, load_features, tokenize
+
+DEFAULT_INDEX_DIR = os.path.join(".cache", "similarity")
+INDEX_FORMAT = 1
+DEFAULT_BATCH_SIZE = 64
+INDEX_ARRAYS = {
+    "idf": np.float32,
+    "col_ptr": np.int64,
+    "post_rows": np.int32,
+    "post_weights": np.float32,
+}
+
+
+def sublinear_tf(counts):
+    return 1.0 + np.log(counts.astype(np.float32))
+
+
+class SimilarityIndex:
+    def __init__(self, features, idf, col_ptr, post_rows, post_weights):
+        self.features = features
+        self.idf = idf
+        self.col_ptr = col_ptr
+        self.post_rows = post_rows
+        self.post_weights = post_weights
+        self.term_ids = {term: index for index, term in enumerate(features.vocab)}
+        self.file_paths = {
+            record["index"]: (path, record["row_start"])
+            for path, record in features.manifest["files"].items()
+        }
+
+    @classmethod
+    def build(cls, features):
+        rows, vocab_size = features.shape
+        indptr = np.asarray(features.indptr)
+        indices = np.asarray(features.indices)
+        df = np.bincount(indices, minlength=vocab_size)
+        idf = (np.log((1.0 + rows) / (1.0 + df)) + 1.0).astype(np.float32)
+
+        row_ids = np.repeat(np.arange(rows, dtype=np.int32), np.diff(indptr))
+        weights = sublinear_tf(np.asarray(features.data)) * idf[indices]
+        norms = np.sqrt(np.bincount(row_ids, weights=weights * weights, minlength=rows))
+        norms[norms == 0] = 1.0
+        weights = (weights / norms[row_ids]).astype(np.float32)
+
+        # Column-major (CSC) copy of the weighted matrix: each term's postings
+        # are one contiguous slice of rows and weights.
+        order = np.argsort(indices, kind="stable")
+        col_ptr = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(df, out=col_ptr[1:])
+        return cls(features, idf, col_ptr, row_ids[order], weights[order])
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            getattr(self, name).tofile(directory / f"{name}.bin")
+        manifest = {
+            "format": INDEX_FORMAT,
+            "features": features_key(self.features.manifest),
+            "lengths": {name: int(len(getattr(self, name))) for name in INDEX_ARRAYS},
+        }
+        write_bytes_atomic(directory / "manifest.json", json.dumps(manifest, indent=1).encode("utf-8") + b"\n")
+
+    @classmethod
+    def load(cls, directory, features):
+        directory = Path(directory)
+        try:
+            with open(directory / "manifest.json", "r", encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except FileNotFoundError:
+            return None
+        if manifest.get("format") != INDEX_FORMAT or manifest.get("features") != features_key(features.manifest):
+            return None
+        arrays = {}
+        for name, dtype in INDEX_ARRAYS.items():
+            length = manifest["lengths"][name]
+            if length:
+                arrays[name] = np.memmap(directory / f"{name}.bin", dtype=dtype, mode="r", shape=(length,))
+            else:
+                arrays[name] = np.zeros(0, dtype=dtype)
+        return cls(features, **arrays)
+
+    def query_vector(self, text):
+        counts = Counter(term for term in tokenize(text) if term in self.term_ids)
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        terms = np.array([self.term_ids[term] for term in counts], dtype=np.int64)
+        weights = sublinear_tf(np.array(list(counts.values()))) * self.idf[terms]
+        return terms, (weights / np.linalg.norm(weights)).astype(np.float32)
+
+    def row_vector(self, row):
+        terms, counts = self.features.row(row)
+        terms = np.asarray(terms, dtype=np.int64)
+        weights = sublinear_tf(np.asarray(counts)) * self.idf[terms]
+        norm = np.linalg.norm(weights) or 1.0
+        return terms, (weights / norm).astype(np.float32)
+
+    def filter_mask(self, hosts=None, sources=None, since=None, until=None):
+        features = self.features
+        mask = np.ones(features.shape[0], dtype=bool)
+        if hosts:
+            patterns = [host.lower() for host in hosts]
+            selected = np.array(
+                [any(pattern in name.lower() for pattern in patterns) for name in features.hosts], dtype=bool
+            )
+            mask &= selected[features.row_host]
+        if sources:
+            codes = [features.sources.index(source) for source in sources]
+            mask &= np.isin(features.row_source, codes)
+        if since:
+            mask &= features.row_date >= np.datetime64(since, "D")
+        if until:
+            mask &= features.row_date <= np.datetime64(until, "D")
+        return mask
+
+    def search_vectors(self, vectors, k=10, mask=None, exclude=None, batch_size=DEFAULT_BATCH_SIZE):
+        rows = self.features.shape[0]
+        results = []
+        for start in range(0, len(vectors), batch_size):
+            batch = vectors[start:start + batch_size]
+            # Dense (batch x rows) scores filled one term at a time: each
+            # posting slice is read once and added to every query using it.
+            scores = np.zeros((len(batch), rows), dtype=np.float32)
+            by_term = {}
+            for position, (terms, weights) in enumerate(batch):
+                for term, weight in zip(terms.tolist(), weights.tolist()):
+                    by_term.setdefault(term, []).append((position, weight))
+            for term, uses in by_term.items():
+                begin, end = self.col_ptr[term], self.col_ptr[term + 1]
+                post_rows = self.post_rows[begin:end]
+                post_weights = self.post_weights[begin:end]
+                for position, weight in uses:
+                    scores[position, post_rows] += weight * post_weights
+            if mask is not None:
+                scores[:, ~mask] = -1.0
+            for position in range(len(batch)):
+                row_scores = scores[position]
+                if exclude is not None and exclude[start + position] is not None:
+                    row_scores[exclude[start + position]] = -1.0
+                top = min(k, rows)
+                candidates = np.argpartition(-row_scores, top - 1)[:top] if top else np.zeros(0, dtype=np.int64)
+                candidates = candidates[np.argsort(-row_scores[candidates], kind="stable")]
+                results.append(
+                    [(int(row), float(row_scores[row])) for row in candidates if row_scores[row] > 0]
+                )
+        return results
+
+    def search(self, texts, k=10, mask=None, batch_size=DEFAULT_BATCH_SIZE):
+        return self.search_vectors([self.query_vector(text) for text in texts], k=k, mask=mask, batch_size=batch_size)
+
+    def similar_rows(self, rows, k=10, mask=None, batch_size=DEFAULT_BATCH_SIZE):
+        return self.search_vectors(
+            [self.row_vector(row) for row in rows], k=k, mask=mask, exclude=list(rows), batch_size=batch_size
+        )
+
+    def describe(self, row):
+        features = self.features
+        path, row_start = self.file_paths[int(features.row_file[row])]
+        text = ""
+        for offset, (_, value) in enumerate(normalized_rows(path)):
+            if offset == row - row_start:
+                text = value
+                break
+        return {
+            "row": int(row),
+            "source": features.sources[int(features.row_source[row])],
+            "date": str(features.row_date[row]),
+            "host": features.hosts[int(features.row_host[row])],
+            "monologue": text,
+        }
+
+
+def features_key(manifest):
+    # Counts alone miss an in-place edit that keeps them; the file digests
+    # change with any edit.
+    files = hashlib.blake2b(digest_size=16)
+    for path, record in sorted(manifest["files"].items()):
+        files.update(f"{path}\0{record['digest']}\0{record['index']}\0{record['row_start']}\n".encode("utf-8"))
+    return [manifest["rows"], manifest["nnz"], manifest["vocab_size"], len(manifest["files"]), files.hexdigest()]
+
+
+def load_index(index_dir=DEFAULT_INDEX_DIR, features_dir=DEFAULT_FEATURES_DIR):
+    features = load_features(features_dir)
+    index = SimilarityIndex.load(index_dir, features)
+    if index is None:
+        index = SimilarityIndex.build(features)
+        index.save(index_dir)
+        index = SimilarityIndex.load(index_dir, features)
+    return index
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Find monologues similar to a text or to an existing row (TF-IDF cosine)."
+    )
+    parser.add_argument("queries", nargs="*", help="Query texts.")
+    parser.add_argument("--queries-file", default=None, help="One query text per line.")
+    parser.add_argument("--row", type=int, nargs="+", default=None, help="Use existing matrix rows as queries.")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--host", nargs="+", default=None, help="Case-insensitive host name substrings.")
+    parser.add_argument("--sources", nargs="+", choices=SOURCE_NAMES, default=None)
+    parser.add_argument("--since", default=None, help="YYYY-MM-DD, inclusive.")
+    parser.add_argument("--until", default=None, help="YYYY-MM-DD, inclusive.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument("--features-dir", default=DEFAULT_FEATURES_DIR)
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Update the feature matrix from the CSV tree first (rebuilds the index if it changed).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print one JSON line per query.")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.refresh:
+        build_features(root=args.root, directory=args.features_dir)
+
+    started = time.perf_counter()
+    index = load_index(args.index_dir, args.features_dir)
+    loaded = time.perf_counter()
+    mask = index.filter_mask(hosts=args.host, sources=args.sources, since=args.since, until=args.until)
+
+    queries = list(args.queries)
+    if args.queries_file:
+        with open(args.queries_file, "r", encoding="utf-8") as fh:
+            queries.extend(line.strip() for line in fh if line.strip())
+    if args.row:
+        rows = index.features.shape[0]
+        for row in args.row:
+            if not 0 <= row < rows:
+                parser.error(f"--row {row} is out of range; the matrix has {rows} rows")
+        labels = [f"row {row}" for row in args.row]
+        results = index.similar_rows(args.row, k=args.k, mask=mask, batch_size=args.batch_size)
+    elif queries:
+        labels = queries
+        results = index.search(queries, k=args.k, mask=mask, batch_size=args.batch_size)
+    else:
+        parser.error("give query texts, --queries-file or --row")
+    searched = time.perf_counter()
+
+    for label, matches in zip(labels, results):
+        described = [dict(index.describe(row), score=round(score, 4)) for row, score in matches]
+        if args.json:
+            print(json.dumps({"query": label, "matches": described}, ensure_ascii=False))
+            continue
+        print(f"# {label}")
+        for match in described:
+            print(f"{match['score']:.3f}\t{match['date']}\t{match['host']}\t{match['monologue']}")
+    print(
+        f"[similarity] queries={len(labels)} load_ms={(loaded - started) * 1000:.1f} "
+        f"search_ms={(searched - loaded) * 1000:.1f}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
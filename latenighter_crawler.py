@@ -1,11 +1,13 @@
 import argparse
-import csv
 import re
 from datetime import datetime
 from pathlib import Path
 
-import requests
-from bs4 import BeautifulSoup
+from atomic_csv import grouped_rows, write_rows_atomic
+from corpus_fingerprints import add_fingerprint_arguments, fingerprints_from_args
+from crawl_metrics import NULL_METRICS, add_metrics_arguments, metrics_from_args
+from crawl_profile import add_profile_arguments
+from db_sink import add_db_sink_arguments, sink_from_args
 
 WP_POSTS_API = "https://latenighter.com/wp-json/wp/v2/posts"
 MONOLOGUES_TAG_ID = 180
@@ -110,6 +112,8 @@ def parse_quote_text(raw_quote):
 
 
 def parse_monologue_quotes(content_html):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(content_html, "html.parser")
     host = None
     quotes = {}
@@ -145,25 +149,37 @@ def parse_monologue_quotes(content_html):
     return quotes
 
 
-def fetch_posts(session, tag_id, per_page=100):
+def fetch_posts_page(
+    session, tag_id, page, per_page=100, api_url=WP_POSTS_API, metrics=NULL_METRICS
+):
+    params = {
+        "tags": tag_id,
+        "per_page": per_page,
+        "page": page,
+        "_fields": "id,date,link,title,content",
+    }
+    with metrics.timer("fetch", page=page):
+        response = session.get(api_url, params=params, timeout=30)
+    metrics.incr("bytes", len(response.content))
+    if getattr(response, "from_cache", False):
+        metrics.incr("cache_hits")
+    if response.status_code == 400:
+        return [], 0
+    response.raise_for_status()
+    total_pages = int(response.headers.get("X-WP-TotalPages", "1"))
+    return response.json(), total_pages
+
+
+def fetch_posts(session, tag_id, per_page=100, api_url=WP_POSTS_API, metrics=NULL_METRICS):
     page = 1
     while True:
-        params = {
-            "tags": tag_id,
-            "per_page": per_page,
-            "page": page,
-            "_fields": "id,date,link,title,content",
-        }
-        response = session.get(WP_POSTS_API, params=params, timeout=30)
-        if response.status_code == 400:
-            break
-        response.raise_for_status()
-        posts = response.json()
+        posts, total_pages = fetch_posts_page(
+            session, tag_id, page, per_page=per_page, api_url=api_url, metrics=metrics
+        )
         if not posts:
             break
         yield from posts
 
-        total_pages = int(response.headers.get("X-WP-TotalPages", "1"))
         if page >= total_pages:
             break
         page += 1
@@ -171,14 +187,8 @@ def fetch_posts(session, tag_id, per_page=100):
 
 def write_csv(output_dir, date_value, quotes_by_host):
     output_path = Path(output_dir) / f"{date_value}.csv"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["name", "monologue"])
-        writer.writeheader()
-        for host, quotes in quotes_by_host.items():
-            for quote in quotes:
-                writer.writerow({"name": host, "monologue": quote})
-    return output_path
+    changed = write_rows_atomic(output_path, grouped_rows(quotes_by_host))
+    return output_path, changed
 
 
 def build_parser():
@@ -186,59 +196,151 @@ def build_parser():
         description="Crawl LateNighter Monologues Round-Up posts into daily CSV files."
     )
     parser.add_argument("--output-dir", default="latenighter")
+    parser.add_argument("--api-url", default=WP_POSTS_API)
     parser.add_argument("--from-date", default="2018-09-29")
     parser.add_argument("--to-date", default=None)
     parser.add_argument("--skip-existing", action="store_true", default=True)
     parser.add_argument("--overwrite-existing", action="store_true")
+    add_db_sink_arguments(parser)
+    add_fingerprint_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
     return parser
 
 
-def main():
-    args = build_parser().parse_args()
-    if args.overwrite_existing:
-        args.skip_existing = False
-
+def parse_date_range(args):
     from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date()
     to_date = (
         datetime.strptime(args.to_date, "%Y-%m-%d").date()
         if args.to_date
         else datetime.utcnow().date()
     )
+    return from_date, to_date
 
-    session = requests.Session()
-    saved = 0
-    skipped = 0
-    ignored = 0
 
-    for post in fetch_posts(session, tag_id=MONOLOGUES_TAG_ID):
-        date_value = date_to_iso(post["date"])
-        date_obj = datetime.strptime(date_value, "%Y-%m-%d").date()
-        if date_obj < from_date or date_obj > to_date:
-            ignored += 1
-            continue
+def crawl_post(post, args, from_date, to_date, metrics=NULL_METRICS, sink=None, fingerprints=None):
+    date_value = date_to_iso(post["date"])
+    date_obj = datetime.strptime(date_value, "%Y-%m-%d").date()
+    if date_obj < from_date or date_obj > to_date:
+        return "ignored", date_value, None, {}
 
-        output_path = Path(args.output_dir) / f"{date_value}.csv"
-        if args.skip_existing and output_path.exists():
-            skipped += 1
-            print(f"[skipped] date={date_value} file={output_path}")
-            continue
+    output_path = Path(args.output_dir) / f"{date_value}.csv"
+    if args.skip_existing and output_path.exists():
+        return "skipped", date_value, output_path, {}
 
-        content_html = post.get("content", {}).get("rendered", "")
+    content_html = post.get("content", {}).get("rendered", "")
+    with metrics.timer("parse", date=date_value):
         quotes_by_host = parse_monologue_quotes(content_html)
-        if not quotes_by_host:
-            ignored += 1
-            print(f"[ignored] date={date_value} reason=no-quotes")
-            continue
+    if not quotes_by_host:
+        return "no-quotes", date_value, None, {}
 
-        write_csv(args.output_dir, date_value, quotes_by_host)
-        saved += 1
+    if fingerprints is not None:
+        quotes_by_host, dropped = fingerprints.filter_rows(quotes_by_host, output_path)
+        metrics.incr("duplicates_dropped", dropped)
+        if not quotes_by_host:
+            return "duplicate", date_value, output_path, {}
+
+    if sink is not None:
+        sink.put(date_value, quotes_by_host)
+    with metrics.timer("write", date=date_value):
+        _, changed = write_csv(args.output_dir, date_value, quotes_by_host)
+    if fingerprints is not None:
+        fingerprints.commit(quotes_by_host)
+    if not changed:
+        return "unchanged", date_value, output_path, quotes_by_host
+    metrics.incr("rows", sum(len(v) for v in quotes_by_host.values()))
+    return "saved", date_value, output_path, quotes_by_host
+
+
+def report_post(status, date_value, output_path, quotes_by_host):
+    if status == "skipped":
+        print(f"[skipped] date={date_value} file={output_path}")
+    elif status == "unchanged":
+        print(f"[unchanged] date={date_value} file={output_path}")
+    elif status == "no-quotes":
+        print(f"[ignored] date={date_value} reason=no-quotes")
+    elif status == "duplicate":
+        print(f"[duplicate] date={date_value} reason=all-quotes-in-corpus")
+    elif status == "saved":
         quote_count = sum(len(v) for v in quotes_by_host.values())
         print(
             f"[saved] date={date_value} hosts={len(quotes_by_host)} "
             f"quotes={quote_count} file={output_path}"
         )
 
-    print(f"Summary: saved={saved} skipped={skipped} ignored={ignored}")
+
+def main(argv=None):
+    import requests
+
+    args = build_parser().parse_args(argv)
+    with requests.Session() as session:
+        return run(args, session)
+
+
+def run(args, session, fingerprints=None, stop=None):
+    if args.overwrite_existing:
+        args.skip_existing = False
+
+    from_date, to_date = parse_date_range(args)
+
+    metrics = metrics_from_args("latenighter", args)
+    sink = sink_from_args("latenighter", args)
+    if fingerprints is None:
+        fingerprints = fingerprints_from_args(args)
+    saved = 0
+    skipped = 0
+    unchanged = 0
+    duplicate = 0
+    ignored = 0
+
+    try:
+        for post in fetch_posts(
+            session, tag_id=MONOLOGUES_TAG_ID, api_url=args.api_url, metrics=metrics
+        ):
+            if stop is not None and stop.is_set():
+                print(f"[stopped] post={post.get('id')}")
+                break
+            result = crawl_post(
+                post, args, from_date, to_date, metrics=metrics, sink=sink, fingerprints=fingerprints
+            )
+            report_post(*result)
+            status = result[0]
+            if status == "saved":
+                saved += 1
+            elif status == "skipped":
+                skipped += 1
+            elif status == "unchanged":
+                unchanged += 1
+            elif status == "duplicate":
+                duplicate += 1
+            else:
+                ignored += 1
+    finally:
+        if sink is not None:
+            sink.close()
+            sink.report(metrics)
+        metrics.incr("days_saved", saved)
+        metrics.incr("days_skipped", skipped)
+        metrics.incr("days_unchanged", unchanged)
+        metrics.incr("days_duplicate", duplicate)
+        metrics.incr("posts_ignored", ignored)
+        metrics.close()
+        if fingerprints is not None:
+            fingerprints.save()
+    dropped = fingerprints.dropped if fingerprints is not None else 0
+    print(
+        f"Summary: saved={saved} skipped={skipped} unchanged={unchanged} "
+        f"duplicate={duplicate} duplicates_dropped={dropped} ignored={ignored}"
+    )
+    return {
+        "source": "latenighter",
+        "saved": saved,
+        "skipped": skipped,
+        "unchanged": unchanged,
+        "duplicate": duplicate,
+        "duplicates_dropped": dropped,
+        "ignored": ignored,
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+import argparse
+import importlib
+import sys
+
+CRAWLERS = {
+    "newsmax": "newsmax_crawler",
+    "latenighter": "latenighter_crawler",
+    "scraps": "scraps_crawler",
+}
+
+# Subcommand -> (module, description). Modules are imported only when their
+# subcommand runs, so `monologue validate` never loads requests, bs4 or psycopg2.
+COMMANDS = {
+    "crawl": (None, "Crawl one or more sources concurrently with per-host pools and politeness limits."),
+    "import": ("csv2sql", "Import every CSV into the Postgres monologue table."),
+    "export": ("monologue_export", "Export the corpus as TSV/JSONL/CSV, optionally compressed and sharded."),
+    "validate": ("corpus_validate", "Check every CSV for schema, encoding, content and duplicate problems."),
+    "stats": ("corpus_stats", "Roll up cached per-day aggregates by host, source and period."),
+    "features": ("corpus_features", "Build or extend the cached document-term matrix."),
+    "similar": ("joke_similarity", "Find similar monologues (TF-IDF cosine)."),
+    "serve": ("corpus_server", "Serve the corpus as a read-only JSON API."),
+    "fingerprints": ("corpus_fingerprints", "Build or query the corpus fingerprint set."),
+    "queue": ("crawl_queue", "Enqueue, work and inspect the SQLite crawl queue."),
+    "bench": ("crawl_bench", "Benchmark the crawlers against the local stand-in server."),
+    "fake-server": ("fake_server", "Run the local stand-in server."),
+    "import-times": (None, "Measure interpreter import cost of each subcommand."),
+}
+
+
+def crawl(argv):
+    from crawl_orchestrator import main as orchestrate
+
+    return orchestrate(argv, prog="monologue crawl")
+
+
+def import_times(argv):
+    import json
+    import re
+    import subprocess
+    import time
+
+    parser = argparse.ArgumentParser(
+        prog="monologue import-times",
+        description="Import each subcommand's module in a fresh interpreter with -X importtime.",
+    )
+    parser.add_argument("--commands", nargs="+", default=None)
+    parser.add_argument("--top", type=int, default=3, help="Heaviest direct imports to list.")
+    parser.add_argument("--record", default=None, help="Append the results as one JSON line to this file.")
+    args = parser.parse_args(argv)
+
+    modules = {"cli": "monologue_cli"}
+    for name, (module, _) in COMMANDS.items():
+        if module:
+            modules[name] = module
+    for name, module in CRAWLERS.items():
+        modules[f"crawl {name}"] = module
+    if args.commands:
+        modules = {name: module for name, module in modules.items() if name in args.commands}
+
+    # "import time: self | cumulative | name"; nesting is the indentation
+    # before the name, and children are printed before their parent.
+    line_re = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)$")
+    results = {}
+    for name, module in modules.items():
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        total = 0
+        children = []
+        direct = []
+        for line in completed.stderr.splitlines():
+            match = line_re.match(line)
+            if not match:
+                continue
+            micros, depth, package = int(match.group(1)), (len(match.group(2)) - 1) // 2, match.group(3)
+            if depth == 1:
+                children.append((package, micros))
+            elif depth == 0:
+                if package == module:
+                    total = micros
+                    direct = children
+                children = []
+        heavy = sorted(direct, key=lambda item: item[1], reverse=True)[: args.top]
+        results[name] = {
+            "module": module,
+            "import_ms": round(total / 1000, 1),
+            "process_ms": round(wall_ms, 1),
+            "heaviest": {package: round(micros / 1000, 1) for package, micros in heavy},
+            "ok": completed.returncode == 0,
+        }
+        heaviest = " ".join(f"{package}={ms}ms" for package, ms in results[name]["heaviest"].items())
+        print(
+            f"[import-times] command={name.replace(' ', ':')} module={module} "
+            f"import_ms={results[name]['import_ms']} process_ms={results[name]['process_ms']} "
+            f"{heaviest}".rstrip()
+        )
+
+    if args.record:
+        with open(args.record, "a", encoding="utf-8") as fh:
+            record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0], "results": results}
+            fh.write(json.dumps(record) + "\n")
+    return results
+
+
+def build_parser():
+    width = max(len(name) for name in COMMANDS)
+    listing = "\n".join(f"  {name.ljust(width)}  {description}" for name, (_, description) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="monologue",
+        description="Late-night monologue corpus tools.",
+        epilog=f"commands:\n{listing}\n\nRun `monologue <command> --help` for command options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "crawl":
+        return crawl(args.args)
+    if args.command == "import-times":
+        results = import_times(args.args)
+        return 0 if all(result["ok"] for result in results.values()) else 1
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    sys.argv[0] = f"monologue {args.command}"
+    result = module.main(args.args)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
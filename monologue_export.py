@@ -0,0 +1,296 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from atomic_csv import write_bytes_atomic
+from corpus import SOURCE_NAMES, iter_source_files, normalized_rows
+from crawl_metrics import add_metrics_arguments, metrics_from_args
+
+FORMATS = ("tsv", "jsonl", "csv")
+COMPRESSIONS = ("none", "gzip", "zstd")
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+HEADER_FIELDS = ("source", "date", "name", "monologue")
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(value):
+    text = value.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    number = text[: len(text) - len(unit)]
+    try:
+        return int(float(number) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}") from None
+
+
+def render_header(fmt):
+    if fmt == "tsv":
+        return ("\t".join(HEADER_FIELDS) + "\n").encode("utf-8")
+    if fmt == "csv":
+        buffer = io.StringIO(newline="")
+        csv.writer(buffer).writerow(HEADER_FIELDS)
+        return buffer.getvalue().encode("utf-8")
+    return b""
+
+
+def render_file(task):
+    source, date_value, path, fmt = task
+    rows = list(normalized_rows(path))
+    if fmt == "tsv":
+        text = "".join(f"{source}\t{date_value}\t{name}\t{body}\n" for name, body in rows)
+    elif fmt == "jsonl":
+        text = "".join(
+            json.dumps(
+                {"source": source, "date": date_value, "name": name, "monologue": body},
+                ensure_ascii=False,
+            )
+            + "\n"
+            for name, body in rows
+        )
+    else:
+        buffer = io.StringIO(newline="")
+        csv.writer(buffer).writerows((source, date_value, name, body) for name, body in rows)
+        text = buffer.getvalue()
+    return source, date_value, len(rows), text.encode("utf-8")
+
+
+def open_compressed(path, compress, level, append):
+    raw = open(path, "ab" if append else "wb")
+    if compress == "gzip":
+        # Appending starts a new gzip member; readers treat concatenated
+        # members as one stream.
+        return raw, gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=level or 6)
+    if compress == "zstd":
+        import zstandard
+
+        # Same for zstd: concatenated frames decompress as one stream.
+        writer = zstandard.ZstdCompressor(level=level or 3).stream_writer(raw, closefd=False)
+        return raw, writer
+    return raw, None
+
+
+class ShardWriter:
+    def __init__(self, output, fmt, compress, level, shard_bytes, index=0, written=0, append=False):
+        self.output = Path(output)
+        self.fmt = fmt
+        self.compress = compress
+        self.level = level
+        self.shard_bytes = shard_bytes
+        self.index = index
+        self.written = written
+        self.append = append
+        self.header = render_header(fmt)
+        self.paths = []
+        self._raw = None
+        self._stream = None
+
+    def shard_path(self, index):
+        if not self.shard_bytes:
+            return self.output
+        name = self.output.name
+        suffix = f".{self.fmt}{COMPRESSION_SUFFIXES[self.compress]}"
+        stem = name[: -len(suffix)] if name.endswith(suffix) else name
+        return self.output.with_name(f"{stem}-{index:05d}{suffix}")
+
+    def _open(self):
+        path = self.shard_path(self.index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        append = self.append and self.written > 0 and path.exists()
+        self._raw, self._stream = open_compressed(path, self.compress, self.level, append)
+        if not append:
+            self.written = 0
+            self._write(self.header)
+        self.paths.append(str(path))
+
+    def _write(self, payload):
+        (self._stream or self._raw).write(payload)
+        self.written += len(payload)
+
+    def _close_current(self):
+        if self._stream is not None:
+            self._stream.close()
+        if self._raw is not None:
+            self._raw.close()
+        self._raw = None
+        self._stream = None
+
+    def write(self, payload):
+        if not payload:
+            return
+        if (
+            self.shard_bytes
+            and self.written > len(self.header)
+            and self.written + len(payload) > self.shard_bytes
+        ):
+            self._close_current()
+            self.index += 1
+            self.written = 0
+        if self._raw is None:
+            self._open()
+        self._write(payload)
+
+    def close(self):
+        self._close_current()
+
+    def shard_size_on_disk(self):
+        path = self.shard_path(self.index)
+        return path.stat().st_size if path.exists() else 0
+
+    def roll_back(self, size):
+        # Drop whatever a failed run appended after the last saved state: the
+        # tail of the current shard and any shards it started after it.
+        path = self.shard_path(self.index)
+        if path.exists() and path.stat().st_size > size:
+            with open(path, "r+b") as fh:
+                fh.truncate(size)
+        if not self.shard_bytes:
+            return
+        index = self.index + 1
+        while self.shard_path(index).exists():
+            self.shard_path(index).unlink()
+            index += 1
+
+
+def default_output(fmt, compress):
+    return f"monologues_all_sources.{fmt}{COMPRESSION_SUFFIXES[compress]}"
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def save_state(path, state):
+    payload = json.dumps(state, indent=2, sort_keys=True).encode("utf-8") + b"\n"
+    write_bytes_atomic(path, payload)
+
+
+def iter_rendered(tasks, workers, chunksize):
+    if workers <= 1:
+        yield from map(render_file, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, so output is deterministic no
+        # matter which worker finishes first.
+        yield from executor.map(render_file, tasks, chunksize=chunksize)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Export all source CSV rows to one TSV, JSONL or CSV stream."
+    )
+    parser.add_argument("--root", default=".", help="Directory holding newsmax/, latenighter/, scraps/.")
+    parser.add_argument("--sources", nargs="+", choices=SOURCE_NAMES, default=list(SOURCE_NAMES))
+    parser.add_argument("--format", choices=FORMATS, default="tsv")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default="none")
+    parser.add_argument("--level", type=int, default=None, help="Compression level.")
+    parser.add_argument("--output", default=None, help="Output path (default: monologues_all_sources.<format>[.gz|.zst]).")
+    parser.add_argument(
+        "--shard-size",
+        type=parse_size,
+        default=0,
+        help="Start a new <output>-NNNNN shard after this many uncompressed bytes, e.g. 256M (default: no sharding).",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=32, help="Files handed to a worker at a time.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only days not exported before, tracked in --state.",
+    )
+    parser.add_argument("--state", default=None, help="State file for --incremental (default: <output>.state.json).")
+    add_metrics_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.compress == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error("--compress zstd needs the zstandard package (pip install zstandard)")
+
+    output = args.output or default_output(args.format, args.compress)
+    state_path = args.state or f"{output}.state.json"
+    settings = {
+        "format": args.format,
+        "compress": args.compress,
+        "shard_size": args.shard_size,
+    }
+
+    state = load_state(state_path) if args.incremental else None
+    if state is not None:
+        previous = {key: state.get(key) for key in settings}
+        if previous != settings:
+            parser.error(f"--incremental settings {settings} differ from last export {previous}")
+        exported = set(state.get("exported", []))
+        writer = ShardWriter(
+            output, args.format, args.compress, args.level, args.shard_size,
+            index=state.get("shard_index", 0), written=state.get("shard_written", 0), append=True,
+        )
+        if "shard_bytes_on_disk" in state:
+            writer.roll_back(state["shard_bytes_on_disk"])
+    else:
+        exported = set()
+        writer = ShardWriter(output, args.format, args.compress, args.level, args.shard_size)
+
+    metrics = metrics_from_args("export", args)
+    tasks = [
+        (source, date_value, str(path), args.format)
+        for source, date_value, path in iter_source_files(args.root, args.sources)
+        if f"{source}/{date_value}" not in exported
+    ]
+
+    files = 0
+    rows = 0
+    started = time.perf_counter()
+    try:
+        with metrics.timer("export", files=len(tasks)):
+            for source, date_value, row_count, payload in iter_rendered(tasks, args.workers, args.chunksize):
+                writer.write(payload)
+                exported.add(f"{source}/{date_value}")
+                files += 1
+                rows += row_count
+                metrics.incr("rows", row_count)
+                metrics.incr("bytes", len(payload))
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+
+    if args.incremental:
+        state = dict(settings)
+        state.update(
+            {
+                "exported": sorted(exported),
+                "shard_index": writer.index,
+                "shard_written": writer.written,
+                "shard_bytes_on_disk": writer.shard_size_on_disk(),
+            }
+        )
+        save_state(state_path, state)
+
+    for path in writer.paths:
+        print(f"[export] wrote={path} size={os.path.getsize(path)}")
+    metrics.close()
+    print(
+        f"Summary: files={files} rows={rows} format={args.format} "
+        f"compress={args.compress} shards={len(writer.paths)} "
+        f"workers={args.workers} seconds={elapsed:.2f}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 4096
+CACHE_FORMAT = 1
+
+
+def rules_fingerprint(*tables):
+    payload = json.dumps(
+        [sorted(table.items()) if isinstance(table, dict) else sorted(table) for table in tables],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class NameCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, fingerprint=""):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def lookup(self, key, compute):
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        value = compute()
+        self.entries[key] = value
+        self.dirty = True
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def load(self):
+        if self.path is None or not self.path.exists():
+            return self
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self
+        # Entries resolved under different name tables or resolver code are stale.
+        if payload.get("format") != CACHE_FORMAT or payload.get("fingerprint") != self.fingerprint:
+            return self
+        for *key, value in payload.get("entries", [])[-self.max_entries:]:
+            self.entries[tuple(key)] = value
+        return self
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "format": CACHE_FORMAT,
+            "fingerprint": self.fingerprint,
+            "entries": [[*key, value] for key, value in self.entries.items()],
+        }
+        # Per-process temp name: queue workers may save the same cache concurrently.
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.path)
+        self.dirty = False
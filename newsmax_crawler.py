@@ -1,14 +1,20 @@
 import argparse
-import csv
+import codecs
+import inspect
 import os
 import re
 import time
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import unquote, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+from atomic_csv import grouped_rows, write_rows_atomic
+from corpus_fingerprints import add_fingerprint_arguments, fingerprints_from_args
+from crawl_metrics import NULL_METRICS, add_metrics_arguments, metrics_from_args
+from crawl_profile import add_profile_arguments
+from db_sink import add_db_sink_arguments, sink_from_args
+from name_cache import NameCache, rules_fingerprint
 
 COMEDIAN_NAMES = {
     "Jay": "Jay Leno",
@@ -26,6 +32,10 @@ DEFAULT_START_PAGE = 1756
 DEFAULT_BASE_URL = "https://www.newsmax.com/jokes/{page}"
 DEFAULT_ARCHIVE_URL = "https://www.newsmax.com/jokes/archive/"
 DEFAULT_FALLBACK_WINDOW = 1000
+DEFAULT_NAME_CACHE = ".cache/newsmax_names.json"
+# Bump when name resolution changes in a way the source hash below cannot
+# see (e.g. a helper outside NAME_RESOLVERS or a dependency's behaviour).
+NAME_RULES_VERSION = 1
 BAD_NAME_TOKENS = {"newsmax", "jokes", "personalities"}
 NAME_ALIASES = {
     "conan o'brien": "Conan O'Brian",
@@ -139,23 +149,49 @@ def infer_name_from_src(src):
     return None
 
 
-def fetch(session, url, timeout, retries):
+def request_headers(args):
+    # Per request, not on the session: the orchestrator shares one session
+    # between sources.
+    user_agent = getattr(args, "user_agent", None)
+    return {"User-Agent": user_agent} if user_agent else None
+
+
+def fetch(session, url, timeout, retries, metrics=NULL_METRICS, stream=False, headers=None):
+    import requests
+
     last_error = None
-    for _ in range(retries):
+    for attempt in range(retries):
+        if attempt:
+            metrics.incr("retries")
+        response = None
         try:
-            response = session.get(url, timeout=timeout)
+            with metrics.timer("fetch", url=url):
+                response = session.get(url, timeout=timeout, stream=stream, headers=headers)
+            if not stream:
+                metrics.incr("bytes", len(response.content))
+            if getattr(response, "from_cache", False):
+                metrics.incr("cache_hits")
             if response.status_code == 404:
+                metrics.incr("not_found")
+                # A streamed body that is never read would keep its pooled
+                # connection checked out.
+                response.close()
                 return None
             response.raise_for_status()
             return response
         except requests.RequestException as exc:
+            if response is not None:
+                response.close()
             last_error = exc
+            metrics.incr("fetch_errors")
             time.sleep(0.5)
     raise last_error
 
 
-def discover_latest_page(session, archive_url, timeout, retries):
-    response = fetch(session, archive_url, timeout=timeout, retries=retries)
+def discover_latest_page(session, archive_url, timeout, retries, metrics=NULL_METRICS, headers=None):
+    response = fetch(
+        session, archive_url, timeout=timeout, retries=retries, metrics=metrics, headers=headers
+    )
     if response is None:
         raise RuntimeError(f"Archive endpoint returned 404: {archive_url}")
 
@@ -183,18 +219,50 @@ def parse_date(soup):
     if date_node is None:
         return None
 
-    date_text = normalize_text(date_node.get_text(" ", strip=True))
+    return parse_date_text(date_node.get_text(" ", strip=True))
+
+
+def parse_date_text(value):
+    date_text = normalize_text(value)
     try:
         return datetime.strptime(date_text, "%A %b %d %Y").strftime("%Y-%m-%d")
     except ValueError:
         return None
 
 
-def parse_comedian_name(header_node):
+def function_source(function):
+    try:
+        return inspect.getsource(function)
+    except (OSError, TypeError):
+        return function.__code__.co_code.hex()
+
+
+def name_rules_fingerprint():
+    # Cached names are only valid for the exact tables and resolver code
+    # that produced them.
+    return rules_fingerprint(
+        COMEDIAN_NAMES,
+        NAME_ALIASES,
+        BAD_NAME_TOKENS,
+        [f"version={NAME_RULES_VERSION}"],
+        [f"{function.__name__}\n{function_source(function)}" for function in NAME_RESOLVERS],
+    )
+
+
+def parse_comedian_name(header_node, name_cache=None):
     img = header_node.find("img")
     alt = img.attrs.get("alt", "") if img is not None else ""
     src = img.attrs.get("src", "") if img is not None else ""
+    header_text = normalize_text(" ".join(header_node.stripped_strings))
+    if name_cache is None:
+        return resolve_comedian_name(alt, src, header_text)
+    return name_cache.lookup(
+        (alt, src, header_text),
+        lambda: resolve_comedian_name(alt, src, header_text),
+    )
+
 
+def resolve_comedian_name(alt, src, header_text):
     # Historical quirk: some Seth entries were mislabeled in alt text.
     if alt == "Late Night With Seth Meyers":
         resolved_name = get_name(src) or get_name(alt)
@@ -213,13 +281,25 @@ def parse_comedian_name(header_node):
         return inferred_name
 
     # Final fallback for future template shifts.
-    header_text = normalize_text(" ".join(header_node.stripped_strings))
     inferred_name = infer_name_from_alt(header_text)
     if inferred_name:
         return inferred_name
     return None
 
 
+NAME_RESOLVERS = (
+    get_name,
+    normalize_text,
+    title_case_token,
+    apply_alias,
+    clean_candidate_name,
+    split_camel_case,
+    infer_name_from_alt,
+    infer_name_from_src,
+    resolve_comedian_name,
+)
+
+
 def extract_jokes(header_node):
     jokes = []
     node = header_node.find_next_sibling()
@@ -235,7 +315,9 @@ def extract_jokes(header_node):
     return jokes
 
 
-def parse_monologue_page(html):
+def parse_monologue_page(html, name_cache=None):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
     joke_page = soup.find("div", class_="jokespage")
     date_value = parse_date(soup)
@@ -244,7 +326,7 @@ def parse_monologue_page(html):
 
     monologue_dict = {}
     for header_node in joke_page.find_all("div", class_="jokesHeader"):
-        comedian_name = parse_comedian_name(header_node)
+        comedian_name = parse_comedian_name(header_node, name_cache=name_cache)
         if comedian_name is None:
             continue
         jokes = extract_jokes(header_node)
@@ -256,23 +338,49 @@ def parse_monologue_page(html):
 
 def write_csv(output_dir, date_value, monologue_dict):
     output_path = Path(output_dir) / f"{date_value}.csv"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["name", "monologue"])
-        writer.writeheader()
-        for name, jokes in monologue_dict.items():
-            for joke in jokes:
-                writer.writerow({"name": name, "monologue": joke})
-    return output_path
-
-
-def crawl_page(session, page, args):
-    url = DEFAULT_BASE_URL.format(page=page)
-    response = fetch(session, url, timeout=args.timeout, retries=args.retries)
+    changed = write_rows_atomic(output_path, grouped_rows(monologue_dict))
+    return output_path, changed
+
+
+def iter_response_text(response, metrics=NULL_METRICS):
+    if response.encoding is None:
+        response.encoding = "utf-8"
+    decoder = codecs.getincrementaldecoder(response.encoding)(errors="replace")
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        metrics.incr("bytes", len(chunk))
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def crawl_page(session, page, args, metrics=NULL_METRICS, name_cache=None, sink=None,
+               fingerprints=None):
+    url = getattr(args, "base_url", DEFAULT_BASE_URL).format(page=page)
+    stream = getattr(args, "stream_parse", False)
+    response = fetch(
+        session,
+        url,
+        timeout=args.timeout,
+        retries=args.retries,
+        metrics=metrics,
+        stream=stream,
+        headers=request_headers(args),
+    )
     if response is None:
         return "missing", None, None
 
-    date_value, monologue_dict = parse_monologue_page(response.text)
+    if stream:
+        from newsmax_stream import parse_monologue_stream
+
+        # The body is still downloading here; parsing overlaps the transfer.
+        with closing(response), metrics.timer("parse", page=page):
+            date_value, monologue_dict = parse_monologue_stream(
+                iter_response_text(response, metrics=metrics), name_cache=name_cache
+            )
+    else:
+        with metrics.timer("parse", page=page):
+            date_value, monologue_dict = parse_monologue_page(
+                response.text, name_cache=name_cache
+            )
     if date_value is None or not monologue_dict:
         return "missing", None, None
 
@@ -280,7 +388,21 @@ def crawl_page(session, page, args):
     if args.skip_existing and output_path.exists():
         return "skipped", date_value, output_path
 
-    write_csv(args.output_dir, date_value, monologue_dict)
+    if fingerprints is not None:
+        monologue_dict, dropped = fingerprints.filter_rows(monologue_dict, output_path)
+        metrics.incr("duplicates_dropped", dropped)
+        if not monologue_dict:
+            return "duplicate", date_value, output_path
+
+    if sink is not None:
+        sink.put(date_value, monologue_dict)
+    with metrics.timer("write", date=date_value):
+        _, changed = write_csv(args.output_dir, date_value, monologue_dict)
+    if fingerprints is not None:
+        fingerprints.commit(monologue_dict)
+    if not changed:
+        return "unchanged", date_value, output_path
+    metrics.incr("rows", sum(len(jokes) for jokes in monologue_dict.values()))
     return "saved", date_value, output_path
 
 
@@ -296,6 +418,12 @@ def build_parser():
         help="Infer latest page id from /jokes/archive when --end-page is omitted.",
     )
     parser.add_argument("--output-dir", default="newsmax")
+    parser.add_argument(
+        "--base-url",
+        default=DEFAULT_BASE_URL,
+        help="Page URL template with a {page} placeholder (e.g. a local stand-in server).",
+    )
+    parser.add_argument("--archive-url", default=DEFAULT_ARCHIVE_URL)
     parser.add_argument(
         "--skip-existing",
         action="store_true",
@@ -342,109 +470,189 @@ def build_parser():
         ),
     )
     parser.add_argument("--sleep", type=float, default=0.1)
+    parser.add_argument(
+        "--stream-parse",
+        action="store_true",
+        help=(
+            "Extract jokes with the event-driven tokenizer while the page "
+            "downloads instead of building a BeautifulSoup tree."
+        ),
+    )
+    parser.add_argument(
+        "--name-cache",
+        default=DEFAULT_NAME_CACHE,
+        help=(
+            "JSON file persisting resolved comedian names keyed on header "
+            "(alt, src, text). Pass an empty string to keep the cache in memory only."
+        ),
+    )
+    add_db_sink_arguments(parser)
+    add_fingerprint_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
     return parser
 
 
-def main():
-    parser = build_parser()
-    args = parser.parse_args()
-
-    if args.overwrite_existing:
-        args.skip_existing = False
+def main(argv=None):
+    import requests
 
-    session = requests.Session()
-    if args.user_agent:
-        session.headers.update({"User-Agent": args.user_agent})
+    args = build_parser().parse_args(argv)
+    with requests.Session() as session:
+        return run(args, session)
 
-    if args.end_page is None and args.auto_end:
-        try:
-            args.end_page = discover_latest_page(
-                session,
-                archive_url=DEFAULT_ARCHIVE_URL,
-                timeout=args.timeout,
-                retries=args.retries,
-            )
-            print(f"Discovered latest page: {args.end_page}")
-        except Exception as exc:  # noqa: BLE001
-            args.end_page = args.start_page + args.fallback_window
-            print(
-                "[warn] auto-end discovery failed "
-                f"(reason={type(exc).__name__}: {exc}); "
-                f"falling back to [{args.start_page}, {args.end_page}]"
-            )
-    elif args.end_page is None:
-        args.end_page = args.start_page + args.fallback_window
-        print(
-            "No --end-page given; defaulting to a bounded window "
-            f"[{args.start_page}, {args.end_page}]"
-        )
 
-    if args.end_page < args.start_page:
-        raise ValueError("--end-page must be >= --start-page")
+def run(args, session, fingerprints=None, stop=None):
+    if args.overwrite_existing:
+        args.skip_existing = False
+    metrics = metrics_from_args("newsmax", args)
+    name_cache = NameCache(args.name_cache, fingerprint=name_rules_fingerprint()).load()
+    sink = sink_from_args("newsmax", args)
+    if fingerprints is None:
+        fingerprints = fingerprints_from_args(args)
 
     consecutive_misses = 0
     consecutive_same_date = 0
     previous_date = None
     saved = 0
     skipped = 0
+    unchanged = 0
+    duplicate = 0
     missing = 0
 
-    for page in range(args.start_page, args.end_page + 1):
-        try:
-            status, date_value, path = crawl_page(session, page, args)
-        except Exception as exc:  # noqa: BLE001
-            print(f"[error] page={page} reason={exc}")
-            status = "missing"
-            date_value = None
-            path = None
-
-        if status == "saved":
-            consecutive_misses = 0
-            saved += 1
-            print(f"[saved] page={page} date={date_value} file={path}")
-        elif status == "skipped":
-            consecutive_misses = 0
-            skipped += 1
-            print(f"[skipped] page={page} date={date_value} file={path}")
-        else:
-            consecutive_misses += 1
-            missing += 1
-            print(f"[missing] page={page}")
-            previous_date = None
-            consecutive_same_date = 0
-
-        if consecutive_misses >= args.stop_after_miss:
+    try:
+        if args.end_page is None and args.auto_end:
+            try:
+                args.end_page = discover_latest_page(
+                    session,
+                    archive_url=args.archive_url,
+                    timeout=args.timeout,
+                    retries=args.retries,
+                    metrics=metrics,
+                    headers=request_headers(args),
+                )
+                print(f"Discovered latest page: {args.end_page}")
+            except Exception as exc:  # noqa: BLE001
+                args.end_page = args.start_page + args.fallback_window
+                print(
+                    "[warn] auto-end discovery failed "
+                    f"(reason={type(exc).__name__}: {exc}); "
+                    f"falling back to [{args.start_page}, {args.end_page}]"
+                )
+        elif args.end_page is None:
+            args.end_page = args.start_page + args.fallback_window
             print(
-                f"Stopping after {consecutive_misses} consecutive misses "
-                f"(threshold={args.stop_after_miss})."
+                "No --end-page given; defaulting to a bounded window "
+                f"[{args.start_page}, {args.end_page}]"
             )
-            break
 
-        if status in {"saved", "skipped"}:
-            if date_value == previous_date:
-                consecutive_same_date += 1
+        if args.end_page < args.start_page:
+            raise ValueError("--end-page must be >= --start-page")
+
+        for page in range(args.start_page, args.end_page + 1):
+            if stop is not None and stop.is_set():
+                print(f"[stopped] page={page}")
+                break
+            try:
+                status, date_value, path = crawl_page(
+                    session,
+                    page,
+                    args,
+                    metrics=metrics,
+                    name_cache=name_cache,
+                    sink=sink,
+                    fingerprints=fingerprints,
+                )
+            except Exception as exc:  # noqa: BLE001
+                print(f"[error] page={page} reason={exc}")
+                status = "missing"
+                date_value = None
+                path = None
+
+            if status == "saved":
+                consecutive_misses = 0
+                saved += 1
+                print(f"[saved] page={page} date={date_value} file={path}")
+            elif status == "skipped":
+                consecutive_misses = 0
+                skipped += 1
+                print(f"[skipped] page={page} date={date_value} file={path}")
+            elif status == "unchanged":
+                consecutive_misses = 0
+                unchanged += 1
+                print(f"[unchanged] page={page} date={date_value} file={path}")
+            elif status == "duplicate":
+                consecutive_misses = 0
+                duplicate += 1
+                print(f"[duplicate] page={page} date={date_value} reason=all-rows-in-corpus")
             else:
-                consecutive_same_date = 1
-                previous_date = date_value
+                consecutive_misses += 1
+                missing += 1
+                print(f"[missing] page={page}")
+                previous_date = None
+                consecutive_same_date = 0
 
-            if consecutive_same_date >= args.stop_after_same_date:
+            if consecutive_misses >= args.stop_after_miss:
                 print(
-                    f"Stopping after {consecutive_same_date} consecutive pages "
-                    f"with same date {date_value} "
-                    f"(threshold={args.stop_after_same_date})."
+                    f"Stopping after {consecutive_misses} consecutive misses "
+                    f"(threshold={args.stop_after_miss})."
                 )
                 break
 
-        if args.sleep > 0:
-            time.sleep(args.sleep)
-
+            if status in {"saved", "skipped", "unchanged", "duplicate"}:
+                if date_value == previous_date:
+                    consecutive_same_date += 1
+                else:
+                    consecutive_same_date = 1
+                    previous_date = date_value
+
+                if consecutive_same_date >= args.stop_after_same_date:
+                    print(
+                        f"Stopping after {consecutive_same_date} consecutive pages "
+                        f"with same date {date_value} "
+                        f"(threshold={args.stop_after_same_date})."
+                    )
+                    break
+
+            if args.sleep > 0:
+                time.sleep(args.sleep)
+    finally:
+        metrics.incr("pages_saved", saved)
+        metrics.incr("pages_skipped", skipped)
+        metrics.incr("pages_unchanged", unchanged)
+        metrics.incr("pages_duplicate", duplicate)
+        metrics.incr("pages_missing", missing)
+        metrics.incr("name_cache_hits", name_cache.hits)
+        metrics.incr("name_cache_misses", name_cache.misses)
+        if sink is not None:
+            sink.close()
+            sink.report(metrics)
+        metrics.close()
+        name_cache.save()
+        if fingerprints is not None:
+            fingerprints.save()
     print(
         "Summary:",
         f"saved={saved}",
         f"skipped={skipped}",
+        f"unchanged={unchanged}",
+        f"duplicate={duplicate}",
+        f"duplicates_dropped={fingerprints.dropped if fingerprints is not None else 0}",
         f"missing={missing}",
+        f"name_cache_hits={name_cache.hits}",
+        f"name_cache_misses={name_cache.misses}",
+        f"name_cache_hit_rate={name_cache.hit_rate():.1%}",
         sep=" ",
     )
+    return {
+        "source": "newsmax",
+        "saved": saved,
+        "skipped": skipped,
+        "unchanged": unchanged,
+        "duplicate": duplicate,
+        "missing": missing,
+        "name_cache_hits": name_cache.hits,
+        "name_cache_misses": name_cache.misses,
+    }
 
 
 if __name__ == "__main__":
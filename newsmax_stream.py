@@ -0,0 +1,264 @@
+import argparse
+import sys
+from html.parser import HTMLParser
+from pathlib import Path
+
+from newsmax_crawler import normalize_text, parse_date_text, parse_monologue_page, resolve_comedian_name
+
+# Same void-element list BeautifulSoup's html.parser builder closes implicitly.
+VOID_ELEMENTS = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+}
+SKIPPED_TEXT_ELEMENTS = {"script", "style"}
+CHUNK_SIZE = 16 * 1024
+
+
+class Element:
+    __slots__ = ("name", "classes")
+
+    def __init__(self, name, classes):
+        self.name = name
+        self.classes = classes
+
+
+class TextCapture:
+    __slots__ = ("element", "strings", "result")
+
+    def __init__(self, element):
+        self.element = element
+        self.strings = []
+        self.result = None
+
+    def text(self):
+        return normalize_text(" ".join(self.strings))
+
+
+class JokesStreamParser(HTMLParser):
+    def __init__(self, name_cache=None):
+        super().__init__(convert_charrefs=True)
+        self.name_cache = name_cache
+        self.stack = []
+        self.pending = []
+        self.date_value = None
+        self.date_capture = None
+        self.date_seen = False
+        self.jokespage = None
+        self.header_capture = None
+        self.header_img = None
+        # open <p> captures, in start order so output follows document order
+        self.paragraphs = {}
+        self.paragraph_queue = []
+        # parent element -> comedian name for headers whose siblings we walk
+        self.active_headers = {}
+        self.buffered = []
+        self.events = []
+
+    def _flush_text(self):
+        if not self.pending:
+            return
+        text = "".join(self.pending).strip()
+        self.pending = []
+        if not text:
+            return
+        if self.date_capture is not None:
+            self.date_capture.strings.append(text)
+        if self.header_capture is not None:
+            self.header_capture.strings.append(text)
+        for capture in self.paragraphs.values():
+            capture.strings.append(text)
+
+    def _emit(self, comedian, joke):
+        if self.date_value is None:
+            # Jokes seen before the date div stay queued until it arrives.
+            self.buffered.append((comedian, joke))
+            return
+        self.events.append((self.date_value, comedian, joke))
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        attr_dict = {}
+        for key, value in attrs:
+            attr_dict[key] = "" if value is None else value
+        classes = attr_dict.get("class", "").split()
+        element = Element(tag, classes)
+        parent = self.stack[-1] if self.stack else None
+
+        if tag == "div" and not self.date_seen and "jokesDate" in classes:
+            self.date_seen = True
+            self.date_capture = TextCapture(element)
+        if tag == "div" and self.jokespage is None and "jokespage" in classes:
+            self.jokespage = element
+
+        if parent is not None and parent in self.active_headers:
+            if tag == "div" and "jokesHeader" in classes:
+                del self.active_headers[parent]
+            elif tag == "p":
+                capture = TextCapture(element)
+                self.paragraphs[element] = capture
+                self.paragraph_queue.append(capture)
+
+        if (
+            tag == "div"
+            and "jokesHeader" in classes
+            and self.header_capture is None
+            and self.jokespage is not None
+            and self.jokespage in self.stack
+        ):
+            self.header_capture = TextCapture(element)
+            self.header_img = None
+        elif tag == "img" and self.header_capture is not None and self.header_img is None:
+            self.header_img = (attr_dict.get("alt", ""), attr_dict.get("src", ""))
+
+        self.stack.append(element)
+        if tag in VOID_ELEMENTS:
+            self._close_to(len(self.stack) - 1)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].name == tag:
+                self._close_to(index)
+                return
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def handle_decl(self, decl):
+        self._flush_text()
+
+    def handle_pi(self, data):
+        self._flush_text()
+
+    def handle_data(self, data):
+        # BeautifulSoup's get_text() leaves script and style strings out.
+        if self.stack and self.stack[-1].name in SKIPPED_TEXT_ELEMENTS:
+            return
+        self.pending.append(data)
+
+    def _close_to(self, index):
+        while len(self.stack) > index:
+            self._close(self.stack.pop())
+
+    def _close(self, element):
+        self.active_headers.pop(element, None)
+
+        capture = self.paragraphs.pop(element, None)
+        if capture is not None:
+            parent = self.stack[-1] if self.stack else None
+            comedian = self.active_headers.get(parent)
+            text = capture.text()
+            capture.result = (comedian, text) if comedian is not None and len(text) > 10 else ()
+            while self.paragraph_queue and self.paragraph_queue[0].result is not None:
+                result = self.paragraph_queue.pop(0).result
+                if result:
+                    self._emit(*result)
+
+        if self.date_capture is not None and self.date_capture.element is element:
+            self.date_value = parse_date_text(self.date_capture.text())
+            self.date_capture = None
+            if self.date_value is not None:
+                for comedian, joke in self.buffered:
+                    self.events.append((self.date_value, comedian, joke))
+            self.buffered = []
+
+        if self.header_capture is not None and self.header_capture.element is element:
+            alt, src = self.header_img or ("", "")
+            header_text = self.header_capture.text()
+            self.header_capture = None
+            if self.name_cache is None:
+                comedian = resolve_comedian_name(alt, src, header_text)
+            else:
+                comedian = self.name_cache.lookup(
+                    (alt, src, header_text),
+                    lambda: resolve_comedian_name(alt, src, header_text),
+                )
+            parent = self.stack[-1] if self.stack else None
+            if comedian is not None and parent is not None:
+                self.active_headers[parent] = comedian
+
+    def pop_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+    def finish(self):
+        self.close()
+        self._flush_text()
+        self._close_to(0)
+        return self.pop_events()
+
+
+def iter_jokes(chunks, parser=None, name_cache=None):
+    if parser is None:
+        parser = JokesStreamParser(name_cache=name_cache)
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.pop_events()
+    yield from parser.finish()
+
+
+def parse_monologue_stream(chunks, name_cache=None):
+    parser = JokesStreamParser(name_cache=name_cache)
+    monologue_dict = {}
+    for _, comedian, joke in iter_jokes(chunks, parser=parser):
+        monologue_dict.setdefault(comedian, []).append(joke)
+    if parser.jokespage is None or parser.date_value is None:
+        return None, {}
+    return parser.date_value, monologue_dict
+
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare the streaming Newsmax extractor against the BeautifulSoup "
+            "parser on saved HTML pages."
+        )
+    )
+    parser.add_argument("paths", nargs="+", help="HTML files or directories of *.html files.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = []
+    for value in args.paths:
+        path = Path(value)
+        if path.is_dir():
+            paths.extend(sorted(path.rglob("*.html")))
+        else:
+            paths.append(path)
+
+    matched = 0
+    mismatched = 0
+    for path in paths:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        expected = parse_monologue_page(html)
+        actual = parse_monologue_stream(iter_file_chunks(path, chunk_size=args.chunk_size))
+        if actual == expected:
+            matched += 1
+        else:
+            mismatched += 1
+            print(f"[mismatch] file={path}")
+    print(f"Summary: matched={matched} mismatched={mismatched}")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,15 @@
 import argparse
-import csv
 import re
 import time
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
-import requests
-from bs4 import BeautifulSoup
+from atomic_csv import grouped_rows, write_rows_atomic
+from corpus_fingerprints import add_fingerprint_arguments, fingerprints_from_args
+from crawl_metrics import NULL_METRICS, add_metrics_arguments, metrics_from_args
+from crawl_profile import add_profile_arguments
+from db_sink import add_db_sink_arguments, sink_from_args
 
 WP_POSTS_API = "https://scrapsfromtheloft.com/wp-json/wp/v2/posts"
 
@@ -76,18 +78,28 @@ def parse_date(value):
     return dt.strftime("%Y-%m-%d")
 
 
-def get_json_with_retry(session, url, params, retries=4, sleep_s=0.8):
+def get_json_with_retry(session, url, params, retries=4, sleep_s=0.8, metrics=NULL_METRICS):
+    import requests
+
     last_error = None
-    for _ in range(retries):
+    for attempt in range(retries):
+        if attempt:
+            metrics.incr("retries")
         try:
-            response = session.get(url, params=params, timeout=35)
+            with metrics.timer("fetch", page=params.get("page")):
+                response = session.get(url, params=params, timeout=35)
+            metrics.incr("bytes", len(response.content))
+            if getattr(response, "from_cache", False):
+                metrics.incr("cache_hits")
             if response.status_code == 429:
+                metrics.incr("rate_limited")
                 time.sleep(sleep_s)
                 continue
             response.raise_for_status()
             return response
         except requests.RequestException as exc:
             last_error = exc
+            metrics.incr("fetch_errors")
             time.sleep(sleep_s)
     raise last_error
 
@@ -129,6 +141,8 @@ def is_noise_paragraph(text):
 
 
 def extract_quotes(content_html, default_author):
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(content_html, "html.parser")
     quotes = defaultdict(list)
     seen = set()
@@ -158,22 +172,28 @@ def extract_quotes(content_html, default_author):
     return quotes
 
 
-def fetch_posts_for_tag(session, tag_id):
+def fetch_posts_page(session, tag_id, page, api_url=WP_POSTS_API, metrics=NULL_METRICS):
+    params = {
+        "tags": tag_id,
+        "per_page": 100,
+        "page": page,
+        "_fields": "id,date,title,link,content",
+    }
+    response = get_json_with_retry(session, api_url, params, metrics=metrics)
+    total_pages = int(response.headers.get("X-WP-TotalPages", "1"))
+    return response.json(), total_pages
+
+
+def fetch_posts_for_tag(session, tag_id, api_url=WP_POSTS_API, metrics=NULL_METRICS):
     page = 1
     while True:
-        params = {
-            "tags": tag_id,
-            "per_page": 100,
-            "page": page,
-            "_fields": "id,date,title,link,content",
-        }
-        response = get_json_with_retry(session, WP_POSTS_API, params)
-        posts = response.json()
+        posts, total_pages = fetch_posts_page(
+            session, tag_id, page, api_url=api_url, metrics=metrics
+        )
         if not posts:
             break
         yield from posts
 
-        total_pages = int(response.headers.get("X-WP-TotalPages", "1"))
         if page >= total_pages:
             break
         page += 1
@@ -181,14 +201,8 @@ def fetch_posts_for_tag(session, tag_id):
 
 def write_day_csv(output_dir, date_value, by_author):
     path = Path(output_dir) / f"{date_value}.csv"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=["name", "monologue"])
-        writer.writeheader()
-        for author, quotes in by_author.items():
-            for quote in quotes:
-                writer.writerow({"name": author, "monologue": quote})
-    return path
+    changed = write_rows_atomic(path, grouped_rows(by_author))
+    return path, changed
 
 
 def build_parser():
@@ -196,6 +210,7 @@ def build_parser():
         description="Crawl late-night transcript posts from scrapsfromtheloft.com."
     )
     parser.add_argument("--output-dir", default="scraps")
+    parser.add_argument("--api-url", default=WP_POSTS_API)
     parser.add_argument("--from-date", default="2017-01-01")
     parser.add_argument("--to-date", default=None)
     parser.add_argument("--skip-existing", action="store_true", default=True)
@@ -208,6 +223,10 @@ def build_parser():
             "within [from-date, to-date] but no longer present in crawl output."
         ),
     )
+    add_db_sink_arguments(parser)
+    add_fingerprint_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
     return parser
 
 
@@ -218,87 +237,179 @@ def parse_date_filename(path):
         return None
 
 
-def main():
-    args = build_parser().parse_args()
-    if args.overwrite_existing:
-        args.skip_existing = False
-
+def parse_date_range(args):
     from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date()
     to_date = (
         datetime.strptime(args.to_date, "%Y-%m-%d").date()
         if args.to_date
         else datetime.utcnow().date()
     )
+    return from_date, to_date
 
-    session = requests.Session()
-    day_quotes = defaultdict(lambda: defaultdict(list))
-    ignored_posts = 0
-    scanned_posts = 0
 
-    for tag_id, tag_config in TAG_CONFIG.items():
-        default_author = tag_config["author"]
-        title_keywords = tag_config.get("title_keywords", [])
-        for post in fetch_posts_for_tag(session, tag_id):
-            scanned_posts += 1
-            date_value = parse_date(post["date"])
-            date_obj = datetime.strptime(date_value, "%Y-%m-%d").date()
-            if date_obj < from_date or date_obj > to_date:
-                ignored_posts += 1
-                continue
+def collect_post_quotes(post, tag_config, from_date, to_date, metrics=NULL_METRICS):
+    date_value = parse_date(post["date"])
+    date_obj = datetime.strptime(date_value, "%Y-%m-%d").date()
+    if date_obj < from_date or date_obj > to_date:
+        return date_value, None
 
-            title = normalize_text(post.get("title", {}).get("rendered", ""))
-            link = normalize_text(post.get("link", ""))
-            if not is_relevant_post(title, link, title_keywords):
-                ignored_posts += 1
-                continue
+    title = normalize_text(post.get("title", {}).get("rendered", ""))
+    link = normalize_text(post.get("link", ""))
+    if not is_relevant_post(title, link, tag_config.get("title_keywords", [])):
+        return date_value, None
 
-            quotes = extract_quotes(
-                post.get("content", {}).get("rendered", ""),
-                default_author=default_author,
-            )
-            if not quotes:
-                ignored_posts += 1
-                continue
+    with metrics.timer("parse", post=post.get("id")):
+        quotes = extract_quotes(
+            post.get("content", {}).get("rendered", ""),
+            default_author=tag_config["author"],
+        )
+    return date_value, quotes or None
 
-            for author, entries in quotes.items():
-                day_quotes[date_value][author].extend(entries)
 
+def write_days(day_quotes, args, metrics=NULL_METRICS, sink=None, fingerprints=None):
     saved = 0
     skipped = 0
+    unchanged = 0
+    duplicate = 0
     for date_value in sorted(day_quotes):
         out_path = Path(args.output_dir) / f"{date_value}.csv"
         if args.skip_existing and out_path.exists():
             skipped += 1
             print(f"[skipped] date={date_value} file={out_path}")
             continue
-        path = write_day_csv(args.output_dir, date_value, day_quotes[date_value])
-        quote_count = sum(len(v) for v in day_quotes[date_value].values())
+        quotes = day_quotes[date_value]
+        if fingerprints is not None:
+            quotes, dropped = fingerprints.filter_rows(quotes, out_path)
+            metrics.incr("duplicates_dropped", dropped)
+            if not quotes:
+                duplicate += 1
+                print(f"[duplicate] date={date_value} reason=all-quotes-in-corpus")
+                continue
+        if sink is not None:
+            sink.put(date_value, quotes)
+        with metrics.timer("write", date=date_value):
+            path, changed = write_day_csv(args.output_dir, date_value, quotes)
+        if fingerprints is not None:
+            fingerprints.commit(quotes)
+        if not changed:
+            unchanged += 1
+            print(f"[unchanged] date={date_value} file={path}")
+            continue
+        quote_count = sum(len(v) for v in quotes.values())
+        metrics.incr("rows", quote_count)
         print(
-            f"[saved] date={date_value} authors={len(day_quotes[date_value])} "
+            f"[saved] date={date_value} authors={len(quotes)} "
             f"quotes={quote_count} file={path}"
         )
         saved += 1
+    return saved, skipped, unchanged, duplicate
 
+
+def prune_stale_days(output_dir, keep_dates, from_date, to_date):
     pruned = 0
-    if args.prune_stale:
-        output_dir = Path(args.output_dir)
-        keep_paths = {output_dir / f"{date_value}.csv" for date_value in day_quotes}
-        for existing in output_dir.glob("*.csv"):
-            file_date = parse_date_filename(existing)
-            if file_date is None:
-                continue
-            if not (from_date <= file_date <= to_date):
-                continue
-            if existing in keep_paths:
-                continue
-            existing.unlink()
-            pruned += 1
-            print(f"[pruned] file={existing}")
+    output_dir = Path(output_dir)
+    keep_paths = {output_dir / f"{date_value}.csv" for date_value in keep_dates}
+    for existing in output_dir.glob("*.csv"):
+        file_date = parse_date_filename(existing)
+        if file_date is None:
+            continue
+        if not (from_date <= file_date <= to_date):
+            continue
+        if existing in keep_paths:
+            continue
+        existing.unlink()
+        pruned += 1
+        print(f"[pruned] file={existing}")
+    return pruned
+
 
+def main(argv=None):
+    import requests
+
+    args = build_parser().parse_args(argv)
+    with requests.Session() as session:
+        return run(args, session)
+
+
+def run(args, session, fingerprints=None, stop=None):
+    if args.overwrite_existing:
+        args.skip_existing = False
+
+    from_date, to_date = parse_date_range(args)
+
+    metrics = metrics_from_args("scraps", args)
+    sink = sink_from_args("scraps", args)
+    if fingerprints is None:
+        fingerprints = fingerprints_from_args(args)
+    day_quotes = defaultdict(lambda: defaultdict(list))
+    ignored_posts = 0
+    scanned_posts = 0
+
+    stopped = False
+    saved = skipped = unchanged = duplicate = 0
+    pruned = 0
+
+    try:
+        for tag_id, tag_config in TAG_CONFIG.items():
+            if stopped:
+                break
+            for post in fetch_posts_for_tag(
+                session, tag_id, api_url=args.api_url, metrics=metrics
+            ):
+                if stop is not None and stop.is_set():
+                    stopped = True
+                    break
+                scanned_posts += 1
+                date_value, quotes = collect_post_quotes(
+                    post, tag_config, from_date, to_date, metrics=metrics
+                )
+                if not quotes:
+                    ignored_posts += 1
+                    continue
+
+                for author, entries in quotes.items():
+                    day_quotes[date_value][author].extend(entries)
+
+        # A day can combine several tags, so a partial scan writes nothing.
+        if stopped:
+            print(f"[stopped] tag={tag_id} days_not_written={len(day_quotes)}")
+            day_quotes = {}
+        saved, skipped, unchanged, duplicate = write_days(
+            day_quotes, args, metrics=metrics, sink=sink, fingerprints=fingerprints
+        )
+    finally:
+        if sink is not None:
+            sink.close()
+            sink.report(metrics)
+        metrics.incr("days_saved", saved)
+        metrics.incr("days_skipped", skipped)
+        metrics.incr("days_unchanged", unchanged)
+        metrics.incr("days_duplicate", duplicate)
+        metrics.incr("posts_ignored", ignored_posts)
+        metrics.close()
+        if fingerprints is not None:
+            fingerprints.save()
+
+    if args.prune_stale and not stopped:
+        pruned = prune_stale_days(args.output_dir, day_quotes, from_date, to_date)
+
+    dropped = fingerprints.dropped if fingerprints is not None else 0
     print(
         f"Summary: scanned_posts={scanned_posts} saved={saved} "
-        f"skipped={skipped} ignored_posts={ignored_posts} pruned={pruned}"
+        f"skipped={skipped} unchanged={unchanged} duplicate={duplicate} "
+        f"duplicates_dropped={dropped} ignored_posts={ignored_posts} pruned={pruned}"
     )
+    return {
+        "source": "scraps",
+        "scanned_posts": scanned_posts,
+        "saved": saved,
+        "skipped": skipped,
+        "unchanged": unchanged,
+        "duplicate": duplicate,
+        "duplicates_dropped": dropped,
+        "ignored_posts": ignored_posts,
+        "pruned": pruned,
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+import csv
+
+import pytest
+
+from atomic_csv import FIELDNAMES
+
+
+def write_day(root, source, date_value, rows):
+    directory = root / source / date_value[:4] if source == "newsmax" else root / source
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{date_value}.csv"
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(rows)
+    return path
+
+
+@pytest.fixture
+def corpus_tree(tmp_path):
+    root = tmp_path / "corpus"
+    write_day(root, "newsmax", "2024-01-02", [
+        ("Jimmy Fallon", "The weather was so cold today that even the snowmen asked for coats."),
+        ("Seth Meyers", "Congress finally agreed on something, and it was lunch."),
+    ])
+    write_day(root, "newsmax", "2024-01-09", [
+        ("Jimmy Kimmel", "A new study says coffee is good for you, which my barista already told me."),
+    ])
+    write_day(root, "latenighter", "2024-01-03", [
+        ("Stephen Colbert", "The weather was so cold today that even the snowmen asked for coats."),
+        ("Stephen Colbert", "Scientists have discovered a new planet, and it is already overbooked."),
+    ])
+    write_day(root, "scraps", "2024-02-01", [
+        ("John Oliver", "Our main story tonight concerns the surprisingly thrilling world of zoning."),
+    ])
+    return root
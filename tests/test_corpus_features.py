@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+import corpus_features
+from conftest import write_day
+
+
+def build(root, directory):
+    return corpus_features.build(root=root, directory=directory, workers=1)
+
+
+def test_incremental_build_matches_full_build(corpus_tree, tmp_path):
+    incremental = tmp_path / "incremental"
+    build(corpus_tree, incremental)
+    write_day(corpus_tree, "scraps", "2024-02-02", [("John Oliver", "Zoning again, because you asked.")])
+    manifest, added, reason = build(corpus_tree, incremental)
+    assert (added, reason) == (1, None)
+
+    full = tmp_path / "full"
+    build(corpus_tree, full)
+    left = corpus_features.load_features(incremental, mmap=False)
+    right = corpus_features.load_features(full, mmap=False)
+    assert left.shape == right.shape == (manifest["rows"], manifest["vocab_size"])
+    for name in ("indptr", "indices", "data", "row_source", "row_date", "row_host"):
+        np.testing.assert_array_equal(getattr(left, name), getattr(right, name))
+    assert left.vocab == right.vocab
+
+
+def test_changed_file_rebuilds_into_fresh_directory(corpus_tree, tmp_path):
+    directory = tmp_path / "features"
+    build(corpus_tree, directory)
+    write_day(corpus_tree, "newsmax", "2024-01-02", [("Jimmy Fallon", "Replaced entirely.")])
+
+    manifest, added, reason = build(corpus_tree, directory)
+    assert reason.endswith("changed")
+    assert added == 4
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["corpus", "features"]
+    assert corpus_features.load_features(directory).shape[0] == manifest["rows"] == 5
+
+
+def test_failed_rebuild_leaves_previous_matrix_intact(corpus_tree, tmp_path, monkeypatch):
+    directory = tmp_path / "features"
+    manifest, _, _ = build(corpus_tree, directory)
+    before = corpus_features.load_features(directory, mmap=False)
+    write_day(corpus_tree, "scraps", "2024-02-01", [("John Oliver", "Rewritten.")])
+
+    def explode(paths, workers):
+        yield corpus_features.tokenize_file(paths[0])
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(corpus_features, "iter_tokenized", explode)
+    with pytest.raises(RuntimeError):
+        build(corpus_tree, directory)
+
+    with open(directory / "manifest.json", encoding="utf-8") as fh:
+        assert json.load(fh) == manifest
+    after = corpus_features.load_features(directory, mmap=False)
+    np.testing.assert_array_equal(before.indices, after.indices)
+    np.testing.assert_array_equal(before.row_date, after.row_date)
+    assert before.vocab == after.vocab
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["corpus", "features"]
@@ -0,0 +1,78 @@
+import multiprocessing
+from types import SimpleNamespace
+
+import pytest
+
+import corpus_fingerprints
+from corpus_fingerprints import FingerprintSet, fingerprint
+
+COLD = "The weather was so cold today that even the snowmen asked for coats."
+
+
+def dedupe_args(root, source, fingerprints):
+    return SimpleNamespace(dedupe=True, fingerprints=str(fingerprints), output_dir=str(root / source))
+
+
+def test_filter_rows_drops_corpus_and_in_batch_duplicates(corpus_tree, tmp_path):
+    fingerprints, files = corpus_fingerprints.build_from_corpus(corpus_tree, tmp_path / "fp.bin")
+    assert files == 4
+    kept, dropped = fingerprints.filter_rows({
+        "Jay Leno": ["  the WEATHER was so cold today that even the snowmen asked for coats. ", "Brand new."],
+        "Conan O'Brian": ["brand   NEW."],
+    })
+    assert kept == {"Jay Leno": ["Brand new."]}
+    assert dropped == 2
+    assert fingerprint("brand new.") in fingerprints
+
+
+def test_filter_rows_keeps_rows_of_the_file_being_rewritten(corpus_tree, tmp_path):
+    fingerprints, _ = corpus_fingerprints.build_from_corpus(corpus_tree, tmp_path / "fp.bin")
+    path = corpus_tree / "latenighter" / "2024-01-03.csv"
+    kept, dropped = fingerprints.filter_rows({"Stephen Colbert": [COLD, "Fresh joke."]}, path)
+    # The row is in this file as well as in a newsmax file; it stays here.
+    assert kept == {"Stephen Colbert": [COLD, "Fresh joke."]}
+    assert dropped == 0
+
+
+def test_only_committed_rows_are_saved(tmp_path):
+    path = tmp_path / "fp.bin"
+    fingerprints = FingerprintSet(str(path))
+    written, _ = fingerprints.filter_rows({"Host": ["Written joke."]})
+    fingerprints.filter_rows({"Host": ["Joke whose write failed."]})
+    fingerprints.commit(written)
+    # Still blocked for the rest of this run, but never persisted.
+    assert fingerprint("Joke whose write failed.") in fingerprints
+    fingerprints.save()
+    assert list(FingerprintSet(str(path)).load().values) == [fingerprint("Written joke.")]
+
+
+def save_one(path, text):
+    fingerprints = FingerprintSet(path).load()
+    kept, _ = fingerprints.filter_rows({"Host": [text]})
+    fingerprints.commit(kept)
+    fingerprints.save()
+
+
+def test_concurrent_saves_keep_every_addition(tmp_path):
+    path = tmp_path / "fp.bin"
+    texts = [f"joke number {index}" for index in range(24)]
+    with multiprocessing.Pool(8) as pool:
+        pool.starmap(save_one, [(str(path), text) for text in texts])
+    saved = FingerprintSet(str(path)).load()
+    assert len(saved) == len(texts)
+    assert list(saved.values) == sorted(fingerprint(text) for text in texts)
+
+
+def test_missing_file_is_built_from_the_output_dir_parent(corpus_tree, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fingerprints = corpus_fingerprints.fingerprints_from_args(
+        dedupe_args(corpus_tree, "scraps", tmp_path / "fp.bin")
+    )
+    assert fingerprint(COLD) in fingerprints
+    assert (tmp_path / "fp.bin").stat().st_size == 8 * len(fingerprints) == 8 * 5
+
+
+def test_missing_file_without_a_corpus_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        corpus_fingerprints.fingerprints_from_args(dedupe_args(tmp_path / "empty", "scraps", tmp_path / "fp.bin"))
+    assert not (tmp_path / "fp.bin").exists()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import corpus_server
+from conftest import write_day
+
+
+def request(root, *targets):
+    async def run():
+        store = corpus_server.CorpusStore(str(root))
+        await store.refresh()
+        server = await asyncio.start_server(
+            lambda reader, writer: corpus_server.handle_client(store, reader, writer), "127.0.0.1", 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        responses = []
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for target in targets:
+                writer.write(f"GET {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode("latin-1"))
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+                length = int(head.lower().split("content-length: ")[1].split("\r\n")[0])
+                body = json.loads(await reader.readexactly(length))
+                responses.append((int(head.split(" ")[1]), body))
+            writer.close()
+        return responses
+
+    return asyncio.run(run())
+
+
+def test_records_paging(corpus_tree):
+    (status, body), = request(corpus_tree, "/records?limit=2&offset=1")
+    assert status == 200
+    assert body["total"] == 6
+    assert [record["date"] for record in body["records"]] == ["2024-01-02", "2024-01-03"]
+
+
+def test_records_rejects_negative_paging(corpus_tree):
+    responses = request(corpus_tree, "/records?limit=-1", "/records?limit=0", "/records?offset=-2")
+    assert [status for status, _ in responses] == [400, 400, 400]
+
+
+def test_route_error_answers_500_and_keeps_serving(corpus_tree, monkeypatch):
+    # A day file deleted after the last scan.
+    days = corpus_server.scan_days(corpus_tree)
+    (corpus_tree / "scraps" / "2024-02-01.csv").unlink()
+    monkeypatch.setattr(corpus_server, "scan_days", lambda root: days)
+    responses = request(corpus_tree, "/day/scraps/2024-02-01", "/day/latenighter/2024-01-03")
+    assert responses[0][0] == 500
+    assert responses[1][0] == 200
+    assert len(responses[1][1]["records"]) == 2
+
+
+def test_unfiltered_pages_match_the_full_listing(corpus_tree):
+    write_day(corpus_tree, "scraps", "2024-01-05", [])
+    targets = [f"/records?limit={limit}&offset={offset}" for offset in range(8) for limit in (1, 2, 5)]
+    responses = request(corpus_tree, "/records?limit=100", *targets)
+    full = responses[0][1]["records"]
+    assert len(full) == 6
+    for target, (status, body) in zip(targets, responses[1:]):
+        limit, offset = (int(part.split("=")[1]) for part in target.split("?")[1].split("&"))
+        assert status == 200 and body["total"] == 6
+        assert body["records"] == full[offset:offset + limit], target
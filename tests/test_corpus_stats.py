@@ -0,0 +1,46 @@
+import pytest
+
+import corpus_stats
+from conftest import write_day
+
+
+def test_cache_round_trip(corpus_tree, tmp_path):
+    cache = tmp_path / "stats.npz"
+    table, report = corpus_stats.load_stats(cache, corpus_tree)
+    assert report == {"files": 4, "rehashed": 4, "parsed": 4, "removed": 0}
+    expected = table.rollup(by=["source", "year"])
+
+    cached, report = corpus_stats.load_stats(cache, corpus_tree, refresh=False)
+    assert report is None and cached.loaded
+    assert cached.rollup(by=["source", "year"]) == expected
+    assert {record["source"]: record["rows"] for record in expected} == {
+        "newsmax": 3,
+        "latenighter": 2,
+        "scraps": 1,
+    }
+
+
+def test_refresh_picks_up_changes(corpus_tree, tmp_path):
+    cache = tmp_path / "stats.npz"
+    corpus_stats.load_stats(cache, corpus_tree)
+    write_day(corpus_tree, "scraps", "2024-02-02", [("John Oliver", "One more story tonight.")])
+    (corpus_tree / "latenighter" / "2024-01-03.csv").unlink()
+
+    table, report = corpus_stats.load_stats(cache, corpus_tree)
+    assert (report["parsed"], report["removed"]) == (1, 1)
+    hosts = {record["host"]: record["files"] for record in table.rollup(by=["host"])}
+    assert hosts["John Oliver"] == 2
+    assert "Stephen Colbert" not in hosts
+
+
+def test_no_refresh_without_cache(tmp_path, capsys):
+    table = corpus_stats.StatsTable.load(tmp_path / "missing.npz")
+    assert not table.loaded
+    assert table.rollup(by=["host", "year"]) == []
+    assert corpus_stats.main(["--no-refresh", "--cache", str(tmp_path / "missing.npz")]) == 1
+    assert "no usable cache" in capsys.readouterr().err
+
+
+def test_sort_key_must_be_grouped(tmp_path):
+    with pytest.raises(SystemExit):
+        corpus_stats.main(["--by", "year", "--sort", "host", "--cache", str(tmp_path / "s.npz")])
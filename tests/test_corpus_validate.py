@@ -0,0 +1,41 @@
+import csv
+
+import corpus
+import corpus_validate
+from conftest import write_day
+
+
+def codes(results):
+    return sorted(item["code"] for issues in results.values() for item in issues)
+
+
+def test_alias_change_invalidates_cache(tmp_path, monkeypatch):
+    write_day(tmp_path, "scraps", "2024-02-01", [("Zed Host", "A perfectly ordinary joke about the weather.")])
+    cache = tmp_path / "validate.json"
+    results, report = corpus_validate.validate(root=tmp_path, cache_path=cache)
+    assert "unknown-host" in codes(results)
+    assert report["checked"] == 1
+
+    results, report = corpus_validate.validate(root=tmp_path, cache_path=cache)
+    assert report["checked"] == 0
+
+    monkeypatch.setattr(corpus_validate, "HOST_ALIASES", {**corpus.HOST_ALIASES, "zed host": "John Oliver"})
+    monkeypatch.setattr(corpus, "HOST_ALIASES", corpus_validate.HOST_ALIASES)
+    results, report = corpus_validate.validate(root=tmp_path, cache_path=cache)
+    assert report["checked"] == 1
+    assert "unknown-host" not in codes(results)
+    assert "non-canonical-host" in codes(results)
+
+
+def test_oversized_field_is_reported_not_fatal(tmp_path):
+    write_day(tmp_path, "scraps", "2024-02-01", [("John Oliver", "x" * 5000)])
+    write_day(tmp_path, "scraps", "2024-02-02", [("John Oliver", "A perfectly ordinary joke about the weather.")])
+    previous = csv.field_size_limit(1000)
+    try:
+        results, report = corpus_validate.validate(root=tmp_path, cache_path="")
+    finally:
+        csv.field_size_limit(previous)
+    assert report["files"] == 2
+    bad = [item for path, issues in results.items() if "2024-02-01" in path for item in issues]
+    assert [item["code"] for item in bad] == ["csv"]
+    assert bad[0]["severity"] == "error"
@@ -0,0 +1,31 @@
+import json
+
+from crawl_metrics import CrawlMetrics, Histogram
+
+
+def test_quantile_past_last_bucket_is_finite():
+    histogram = Histogram()
+    histogram.observe(120.0)
+    assert histogram.quantile(0.99) == histogram.buckets[-1]
+
+
+def test_jsonl_summary_is_strict_json(tmp_path):
+    jsonl = tmp_path / "m.jsonl"
+    metrics = CrawlMetrics("newsmax", jsonl_path=jsonl)
+    metrics.observe("fetch", 45.0)
+    metrics.close()
+    summary = json.loads(jsonl.read_text(encoding="utf-8").splitlines()[-1], parse_constant=lambda name: 1 / 0)
+    assert summary["fetch_p99"] == 30.0
+
+
+def test_every_metric_has_help(tmp_path):
+    prom = tmp_path / "m.prom"
+    metrics = CrawlMetrics("newsmax", prom_path=prom)
+    metrics.incr("rows", 3)
+    metrics.incr("pages_saved")
+    metrics.close()
+    lines = prom.read_text(encoding="utf-8").splitlines()
+    typed = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    helped = {line.split()[2] for line in lines if line.startswith("# HELP")}
+    assert typed == helped
+    assert "# HELP monologue_pages_saved_total Pages saved." in lines
@@ -0,0 +1,114 @@
+import csv
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import crawl_orchestrator
+import fake_server
+from conftest import write_day
+
+SHARED = "Scientists say the moon is drifting away, and honestly, same."
+
+
+def csv_texts(directory):
+    texts = []
+    for path in sorted(directory.glob("*.csv")):
+        with open(path, encoding="utf-8", newline="") as fh:
+            texts.extend(row["monologue"] for row in csv.DictReader(fh))
+    return texts
+
+
+@pytest.fixture
+def served(tmp_path):
+    root = tmp_path / "served"
+    write_day(root, "latenighter", "2024-03-01", [
+        ("Stephen Colbert", SHARED),
+        ("Stephen Colbert", "The new phone folds in half, just like my budget."),
+    ])
+    write_day(root, "scraps", "2024-03-02", [
+        ("John Oliver", SHARED),
+        ("John Oliver", "Tonight we are talking about municipal water boards, stay with me."),
+    ])
+    server = fake_server.start_in_thread(root)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def source_args(url, out, source):
+    return f"--output-dir {out / source} --api-url {url}/{source}/wp-json/wp/v2/posts --from-date 2024-01-01"
+
+
+def test_concurrent_dedupe_shares_one_set(served, tmp_path, capsys):
+    out = tmp_path / "out"
+    for source in ("latenighter", "scraps"):
+        (out / source).mkdir(parents=True)
+    code = crawl_orchestrator.main([
+        "latenighter", "scraps", "--dedupe", "--fingerprints", str(tmp_path / "fp.bin"),
+        "--latenighter-args", source_args(served, out, "latenighter"),
+        "--scraps-args", source_args(served, out, "scraps"),
+    ])
+    assert code == 0
+    texts = csv_texts(out / "latenighter") + csv_texts(out / "scraps")
+    assert texts.count(SHARED) == 1
+    assert len(texts) == 3
+    assert capsys.readouterr().out.count("[fingerprints] built=") == 1
+
+
+@pytest.mark.parametrize("shared", [["--metrics-prom", "m.prom"], ["--metrics-jsonl", "m.jsonl"], ["--output-dir", "x"]])
+def test_shared_output_paths_are_rejected(shared, capsys):
+    with pytest.raises(SystemExit):
+        crawl_orchestrator.main(["latenighter", "scraps", *shared])
+    assert "would be shared by latenighter and scraps" in capsys.readouterr().err
+
+
+def test_profile_with_several_sources_is_rejected(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        crawl_orchestrator.main([
+            "latenighter", "scraps", "--scraps-args", f"--profile {tmp_path}",
+        ])
+    assert "--profile (scraps) works with one source at a time" in capsys.readouterr().err
+
+
+def test_per_source_output_paths_are_accepted(tmp_path):
+    parser = crawl_orchestrator.build_parser()
+    namespace, rest = parser.parse_known_args([
+        "latenighter", "scraps",
+        "--latenighter-args", f"--metrics-prom {tmp_path / 'l.prom'}",
+        "--scraps-args", f"--metrics-prom {tmp_path / 's.prom'}",
+    ])
+    parsed = crawl_orchestrator.parse_source_args(parser, namespace, ["latenighter", "scraps"], rest)
+    assert parsed["scraps"][1].metrics_prom.endswith("s.prom")
+
+
+def test_failing_source_prints_traceback_and_others_finish(capsys):
+    def broken(args, session, fingerprints=None, stop=None):
+        raise TypeError("bad page")
+
+    def fine(args, session, fingerprints=None, stop=None):
+        print("[saved] date=2024-01-01")
+        return {"saved": 1}
+
+    parsed = {"newsmax": (SimpleNamespace(run=broken), None), "scraps": (SimpleNamespace(run=fine), None)}
+    results, _ = crawl_orchestrator.run_sources(parsed, session=None, progress_seconds=0)
+    assert results["newsmax"]["error"] == "TypeError: bad page"
+    assert results["scraps"]["summary"] == {"saved": 1}
+    out = capsys.readouterr().out
+    assert "newsmax     | Traceback (most recent call last):" in out
+    assert 'raise TypeError("bad page")' in out
+
+
+def test_stop_event_ends_every_source():
+    def endless(args, session, fingerprints=None, stop=None):
+        while not stop.is_set():
+            time.sleep(0.01)
+        return {}
+
+    stop = threading.Event()
+    parsed = {source: (SimpleNamespace(run=endless), None) for source in ("newsmax", "scraps")}
+    threading.Timer(0.2, stop.set).start()
+    started = time.monotonic()
+    results, _ = crawl_orchestrator.run_sources(parsed, session=None, progress_seconds=0, stop=stop)
+    assert time.monotonic() - started < 2
+    assert all(result["stopped"] and not result["error"] for result in results.values())
@@ -0,0 +1,90 @@
+import crawl_queue
+
+
+def jobs(pages):
+    return [(str(page), {"page": page}) for page in pages]
+
+
+def states(conn):
+    return dict(conn.execute("SELECT key, state FROM jobs WHERE source = 'newsmax'"))
+
+
+def drain(conn, owner="test"):
+    while True:
+        job = crawl_queue.lease_job(conn, owner, lease_seconds=60, max_attempts=3)
+        if job is None:
+            return
+        crawl_queue.complete_job(conn, job, owner)
+
+
+def test_enqueue_rearms_finished_jobs(tmp_path):
+    conn = crawl_queue.connect(str(tmp_path / "queue.sqlite3"))
+    assert crawl_queue.enqueue(conn, "newsmax", jobs(range(1, 4))) == 3
+    drain(conn)
+    assert set(states(conn).values()) == {"done"}
+
+    assert crawl_queue.enqueue(conn, "newsmax", jobs(range(1, 4))) == 3
+    assert set(states(conn).values()) == {"pending"}
+    assert conn.execute("SELECT MAX(attempts) FROM jobs").fetchone()[0] == 0
+
+
+def test_enqueue_leaves_outstanding_jobs_alone(tmp_path):
+    conn = crawl_queue.connect(str(tmp_path / "queue.sqlite3"))
+    crawl_queue.enqueue(conn, "newsmax", jobs([1, 2]))
+    job = crawl_queue.lease_job(conn, "test", lease_seconds=60, max_attempts=3)
+
+    assert crawl_queue.enqueue(conn, "newsmax", jobs([1, 2, 3])) == 1
+    assert states(conn) == {job.key: "leased", "2": "pending", "3": "pending"}
+
+
+def test_enqueue_rearms_dead_jobs(tmp_path):
+    conn = crawl_queue.connect(str(tmp_path / "queue.sqlite3"))
+    crawl_queue.enqueue(conn, "newsmax", jobs([1]))
+    job = crawl_queue.lease_job(conn, "test", lease_seconds=60, max_attempts=1)
+    assert crawl_queue.fail_job(conn, job, "test", "boom", max_attempts=1, backoff=0) == "dead"
+
+    assert crawl_queue.enqueue(conn, "newsmax", jobs([1])) == 1
+    assert conn.execute("SELECT state, last_error FROM jobs").fetchone() == ("pending", None)
+
+
+def stage_scraps(conn, tmp_path, pages):
+    crawl_queue.set_source_options(conn, "scraps", {
+        "output_dir": str(tmp_path / "scraps"),
+        "skip_existing": False,
+        "from_date": "2024-01-01",
+        "prune_stale": True,
+    })
+    crawl_queue.enqueue(conn, "scraps", [(f"tag:{page}", {"page": page}) for page in pages])
+    with crawl_queue.write_transaction(conn):
+        conn.execute("INSERT INTO scraps_quotes VALUES (0, 1, 0, '2024-01-01', 'John Oliver', 'A joke from page one.')")
+
+
+def test_finalize_refuses_while_scraps_job_is_dead(tmp_path):
+    conn = crawl_queue.connect(str(tmp_path / "queue.sqlite3"))
+    stage_scraps(conn, tmp_path, [1, 2])
+    done = crawl_queue.lease_job(conn, "test", lease_seconds=60, max_attempts=1)
+    crawl_queue.complete_job(conn, done, "test")
+    failed = crawl_queue.lease_job(conn, "test", lease_seconds=60, max_attempts=1)
+    crawl_queue.fail_job(conn, failed, "test", "boom", max_attempts=1, backoff=0)
+    existing = tmp_path / "scraps" / "2024-01-02.csv"
+    existing.parent.mkdir()
+    existing.write_text("name,monologue\nJohn Oliver,A joke from page two.\n", encoding="utf-8")
+
+    assert crawl_queue.finalize_scraps(conn) is False
+    assert not (tmp_path / "scraps" / "2024-01-01.csv").exists()
+
+    assert crawl_queue.finalize_scraps(conn, force=True) is True
+    assert (tmp_path / "scraps" / "2024-01-01.csv").exists()
+    assert existing.exists()
+    assert conn.execute("SELECT COUNT(*) FROM scraps_quotes").fetchone()[0] == 1
+    assert crawl_queue.get_source_options(conn, "scraps")
+
+
+def test_finalize_clears_staging_once_all_done(tmp_path):
+    conn = crawl_queue.connect(str(tmp_path / "queue.sqlite3"))
+    stage_scraps(conn, tmp_path, [1])
+    drain(conn)
+
+    assert crawl_queue.finalize_scraps(conn) is True
+    assert conn.execute("SELECT COUNT(*) FROM scraps_quotes").fetchone()[0] == 0
+    assert crawl_queue.get_source_options(conn, "scraps") == {}
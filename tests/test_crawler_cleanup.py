@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+import db_sink
+import fake_server
+import latenighter_crawler
+from conftest import write_day
+
+
+@pytest.fixture
+def served(tmp_path):
+    root = tmp_path / "served"
+    write_day(root, "latenighter", "2024-03-01", [
+        ("Stephen Colbert", "The new phone folds in half, just like my budget."),
+    ])
+    server = fake_server.start_in_thread(root)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class RecordingSink:
+    def __init__(self):
+        self.closed = False
+
+    def put(self, date_value, rows_by_name):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def report(self, metrics):
+        metrics.incr("db_rows", 0)
+
+
+def test_crawl_error_still_closes_sink_and_writes_metrics(served, tmp_path, monkeypatch):
+    sink = RecordingSink()
+    monkeypatch.setattr(latenighter_crawler, "sink_from_args", lambda source, args: sink)
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("parser exploded")
+
+    monkeypatch.setattr(latenighter_crawler, "crawl_post", boom)
+    prom = tmp_path / "latenighter.prom"
+    with pytest.raises(RuntimeError):
+        latenighter_crawler.main([
+            "--output-dir", str(tmp_path / "out"),
+            "--api-url", f"{served}/latenighter/wp-json/wp/v2/posts",
+            "--from-date", "2024-01-01",
+            "--metrics-prom", str(prom),
+        ])
+    assert sink.closed
+    assert "monologue_rows_per_second" in prom.read_text(encoding="utf-8")
+
+
+def test_sink_error_is_reported_before_close(capsys):
+    sink = db_sink.DatabaseSink("test", "host=/nonexistent dbname=x connect_timeout=1").start()
+    deadline = time.monotonic() + 10
+    while sink.error is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert "[db-sink] error source=test" in capsys.readouterr().out
+    sink.put("2024-01-01", {"Someone": ["a joke"]})
+    sink.close()
+    assert sink.error
@@ -0,0 +1,16 @@
+import pytest
+
+import csv2sql
+
+
+def test_failed_import_still_writes_metrics(corpus_tree, tmp_path, monkeypatch):
+    def boom(dirname, filename, source_name, connect_str, metrics):
+        metrics.incr("rows")
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(csv2sql, "csv2sql", boom)
+    monkeypatch.chdir(corpus_tree)
+    prom = tmp_path / "csv2sql.prom"
+    with pytest.raises(RuntimeError):
+        csv2sql.main(["--metrics-prom", str(prom)])
+    assert 'monologue_rows_total{source="csv2sql"} 1' in prom.read_text(encoding="utf-8")
@@ -0,0 +1,54 @@
+import pytest
+
+import corpus_features
+import joke_similarity
+from conftest import write_day
+
+
+@pytest.fixture
+def dirs(corpus_tree, tmp_path):
+    features_dir = tmp_path / "features"
+    corpus_features.build(root=corpus_tree, directory=features_dir)
+    return ["--features-dir", str(features_dir), "--index-dir", str(tmp_path / "similarity")]
+
+
+def test_search_ranks_matching_rows_first(dirs, corpus_tree, tmp_path):
+    index = joke_similarity.load_index(dirs[3], dirs[1])
+    (matches,) = index.search(["snowmen in the cold weather"], k=3)
+    rows = [row for row, _ in matches[:2]]
+    assert matches[0][1] == pytest.approx(matches[1][1])
+    assert matches[1][1] > matches[2][1]
+    assert {index.describe(row)["host"] for row in rows} == {"Jimmy Fallon", "Stephen Colbert"}
+    (similar,) = index.similar_rows([rows[0]], k=3)
+    assert similar[0][0] == rows[1]
+    assert similar[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.parametrize("row", ["6", "-1", "99999999"])
+def test_out_of_range_row_is_a_usage_error(dirs, row, capsys):
+    with pytest.raises(SystemExit):
+        joke_similarity.main([*dirs, "--row", row])
+    assert "out of range" in capsys.readouterr().err
+
+
+def test_in_place_edit_with_same_counts_rebuilds_index(tmp_path):
+    root = tmp_path / "corpus"
+    write_day(root, "scraps", "2024-02-01", [("John Oliver", "alpha beta")])
+    write_day(root, "scraps", "2024-02-02", [("John Oliver", "gamma delta")])
+    write_day(root, "scraps", "2024-02-03", [("John Oliver", "alpha gamma")])
+    features_dir, index_dir = tmp_path / "features", tmp_path / "similarity"
+    corpus_features.build(root=root, directory=features_dir)
+    before = joke_similarity.load_index(index_dir, features_dir)
+    assert len(before.search(["alpha"], k=3)[0]) == 2
+
+    write_day(root, "scraps", "2024-02-03", [("John Oliver", "beta delta")])
+    corpus_features.build(root=root, directory=features_dir)
+    index = joke_similarity.load_index(index_dir, features_dir)
+    (matches,) = index.search(["alpha"], k=3)
+    assert [index.describe(row)["monologue"] for row, _ in matches] == ["alpha beta"]
+
+
+def test_unknown_source_is_a_usage_error(dirs, capsys):
+    with pytest.raises(SystemExit):
+        joke_similarity.main([*dirs, "--sources", "foo", "--", "cold"])
+    assert "invalid choice: 'foo'" in capsys.readouterr().err
@@ -0,0 +1,38 @@
+import gzip
+
+import pytest
+
+import monologue_export
+from conftest import write_day
+
+
+def exported_lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return fh.read().splitlines()
+
+
+@pytest.mark.parametrize("shard", ["0", "200", "2K"])
+def test_failed_incremental_run_is_rolled_back(corpus_tree, tmp_path, monkeypatch, shard):
+    output = tmp_path / "out" / "all.tsv.gz"
+    args = ["--root", str(corpus_tree), "--compress", "gzip", "--incremental", "--workers", "1",
+            "--output", str(output), "--shard-size", shard]
+    assert monologue_export.main(args) == 0
+
+    write_day(corpus_tree, "scraps", "2024-03-01", [("John Oliver", "First new day, long enough to matter.")])
+    write_day(corpus_tree, "scraps", "2024-03-02", [("John Oliver", "Second new day, also long enough.")])
+    real = monologue_export.iter_rendered
+
+    def fail_after_first(tasks, workers, chunksize):
+        rendered = real(tasks, workers, chunksize)
+        yield next(rendered)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(monologue_export, "iter_rendered", fail_after_first)
+    with pytest.raises(OSError):
+        monologue_export.main(args)
+    monkeypatch.setattr(monologue_export, "iter_rendered", real)
+    assert monologue_export.main(args) == 0
+
+    lines = [line for path in sorted(output.parent.glob("all*.tsv.gz")) for line in exported_lines(path)]
+    body = [line for line in lines if not line.startswith("source\t")]
+    assert len(body) == len(set(body)) == 8
@@ -0,0 +1,29 @@
+import newsmax_crawler
+from name_cache import NameCache
+
+
+def resolve(alt, src, header):
+    return "Somebody Else"
+
+
+def test_fingerprint_tracks_resolver_code_and_version(monkeypatch):
+    original = newsmax_crawler.name_rules_fingerprint()
+    assert newsmax_crawler.name_rules_fingerprint() == original
+
+    resolvers = (*newsmax_crawler.NAME_RESOLVERS[:-1], resolve)
+    monkeypatch.setattr(newsmax_crawler, "NAME_RESOLVERS", resolvers)
+    changed_code = newsmax_crawler.name_rules_fingerprint()
+    assert changed_code != original
+
+    monkeypatch.setattr(newsmax_crawler, "NAME_RULES_VERSION", newsmax_crawler.NAME_RULES_VERSION + 1)
+    assert newsmax_crawler.name_rules_fingerprint() not in {original, changed_code}
+
+
+def test_cache_from_other_rules_is_discarded(tmp_path):
+    path = tmp_path / "names.json"
+    cache = NameCache(path, fingerprint="old")
+    cache.lookup(("alt", "src", "header"), lambda: "Jay Leno")
+    cache.save()
+
+    assert NameCache(path, fingerprint="old").load().entries
+    assert not NameCache(path, fingerprint="new").load().entries
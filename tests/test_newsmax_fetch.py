@@ -0,0 +1,66 @@
+import pytest
+import requests
+
+import newsmax_crawler
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+        self.content = b""
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, *statuses):
+        self.responses = [FakeResponse(status) for status in statuses]
+        self.served = []
+        self.headers = {}
+        self.request_headers = []
+
+    def get(self, url, timeout, stream=False, headers=None):
+        response = self.responses[len(self.served)]
+        self.served.append(response)
+        self.request_headers.append(headers)
+        return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(newsmax_crawler.time, "sleep", lambda seconds: None)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_not_found_response_is_closed(stream):
+    session = FakeSession(404)
+    assert newsmax_crawler.fetch(session, "http://x/1", timeout=1, retries=3, stream=stream) is None
+    assert session.served[0].closed
+
+
+def test_failed_attempts_are_closed_and_success_is_returned_open():
+    session = FakeSession(500, 503, 200)
+    response = newsmax_crawler.fetch(session, "http://x/1", timeout=1, retries=3, stream=True)
+    assert response is session.served[2] and not response.closed
+    assert [r.closed for r in session.served[:2]] == [True, True]
+
+
+def test_last_error_is_raised_after_retries():
+    session = FakeSession(500, 500)
+    with pytest.raises(requests.HTTPError):
+        newsmax_crawler.fetch(session, "http://x/1", timeout=1, retries=2, stream=True)
+    assert all(response.closed for response in session.served)
+
+
+def test_user_agent_is_sent_per_request_not_set_on_session():
+    session = FakeSession(404)
+    args = newsmax_crawler.build_parser().parse_args(["--user-agent", "tester/1.0", "--retries", "1"])
+    assert newsmax_crawler.crawl_page(session, 1, args) == ("missing", None, None)
+    assert session.request_headers == [{"User-Agent": "tester/1.0"}]
+    assert session.headers == {}
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pytest
+
+from newsmax_crawler import parse_monologue_page
+from newsmax_stream import iter_file_chunks, main, parse_monologue_stream
+
+FIXTURES = sorted((Path(__file__).resolve().parent.parent / "fixtures" / "newsmax").glob("*.html"))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=[path.stem for path in FIXTURES])
+@pytest.mark.parametrize("chunk_size", [1, 7, 16 * 1024])
+def test_stream_parser_matches_tree_parser(path, chunk_size):
+    expected = parse_monologue_page(path.read_text(encoding="utf-8"))
+    assert parse_monologue_stream(iter_file_chunks(path, chunk_size=chunk_size)) == expected
+
+
+def test_fixtures_cover_pages_with_and_without_jokes():
+    results = {path.stem: parse_monologue_page(path.read_text(encoding="utf-8")) for path in FIXTURES}
+    assert len(results) >= 8
+    assert results["missing-date"] == (None, {})
+    assert results["no-jokes-page"] == (None, {})
+    date_value, jokes = results["name-resolution"]
+    assert date_value == "2013-11-15"
+    assert list(jokes) == ["Jimmy Fallon", "Taylor Tomlinson", "Conan O'Brian", "Michael Kosta"]
+
+
+def test_compare_cli_reports_no_mismatches(capsys):
+    assert main([str(FIXTURES[0].parent)]) == 0
+    assert f"matched={len(FIXTURES)} mismatched=0" in capsys.readouterr().out